@@ -0,0 +1,173 @@
+import asyncio
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+import zstandard
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from app.aws import AWSManager
+from app.config import settings
+from app.exceptions import RecordAlreadyExists
+from app.schemas.archive import ArchiveSegmentCreate
+from app.services.archive import ArchiveSegmentService
+from app.services.message import MessageService
+
+
+def encode_segment(messages: List[dict]) -> bytes:
+    lines = (
+        json.dumps(jsonable_encoder(m, custom_encoder={ObjectId: str}))
+        for m in messages
+    )
+    payload = "\n".join(lines).encode()
+    return zstandard.ZstdCompressor(level=settings.archive.COMPRESSION_LEVEL).compress(
+        payload
+    )
+
+
+def decode_segment(data: bytes) -> List[dict]:
+    payload = zstandard.ZstdDecompressor().decompress(data)
+    return [json.loads(line) for line in payload.splitlines() if line]
+
+
+class MessageArchive:
+    def __init__(
+        self,
+        aws_factory: Callable[[], AWSManager] = AWSManager,
+        cache_size: int = settings.archive.CACHE_SEGMENTS,
+    ) -> None:
+        # AWSManager closes its clients after every call, so it can't be shared
+        # between concurrent requests, each call gets its own like the routers do
+        self.aws_factory = aws_factory
+        self.segments = ArchiveSegmentService()
+        self.messages = MessageService()
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, List[dict]] = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    async def _segment(self, key: str) -> List[dict]:
+        # decompressed segments are immutable, keep the most recently used ones
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        if key in self._loading:
+            return await self._loading[key]
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            messages = decode_segment(await self.aws_factory().get_object(key))
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, waiters re-raise it
+            raise
+        else:
+            future.set_result(messages)
+        finally:
+            del self._loading[key]
+
+        self._cache[key] = messages
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return messages
+
+    async def load(
+        self,
+        conv_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+    ) -> List[dict]:
+        # newest archived messages before the cursor, or oldest after it
+        before = before.lower() if before else before
+        after = after.lower() if after else after
+        result: List[dict] = []
+        segment_limit = max(1, -(-limit // settings.archive.SEGMENT_SIZE)) + 1
+
+        # segments from quiet conversations can be small, keep reading batches
+        # until the page is full or the archive runs out
+        segment_after: Optional[str] = None
+        while len(result) < limit:
+            segments = await self.segments.find_segments(
+                conv_id,
+                segment_limit,
+                before=before,
+                after=after,
+                segment_after=segment_after,
+            )
+            for segment in segments:
+                messages = await self._segment(segment.key)
+                if after is not None:
+                    result.extend(m for m in messages if m["_id"] > after)
+                elif before is not None:
+                    result.extend(m for m in messages if m["_id"] < before)
+                else:
+                    result.extend(messages)
+
+                if len(result) >= limit:
+                    break
+
+            if len(segments) < segment_limit:
+                break
+            segment_after = str(segments[-1].lastId)
+
+        result.sort(key=lambda m: m["_id"], reverse=after is None)
+        return result[:limit]
+
+    async def archive_conversation(self, conv_id: str, cutoff: ObjectId) -> int:
+        archived = 0
+        while True:
+            records = await self.messages.find_all(
+                conversationId=conv_id,
+                order="id",
+                before=cutoff,
+                limit=settings.archive.SEGMENT_SIZE,
+            )
+            if not records:
+                return archived
+
+            messages = [r.model_dump(by_alias=True) for r in records]
+            first_id, last_id = str(messages[0]["_id"]), str(messages[-1]["_id"])
+            key = f"{settings.archive.PREFIX}/{conv_id}/{first_id}-{last_id}.jsonl.zst"
+            body = encode_segment(messages)
+
+            # upload, manifest, delete: a crash in between re-archives the same
+            # batch under the same key on the next run
+            await self.aws_factory().put_object(key, body, "application/zstd")
+            try:
+                await self.segments.create(
+                    ArchiveSegmentCreate(
+                        conversationId=conv_id,
+                        key=key,
+                        firstId=first_id,
+                        lastId=last_id,
+                        count=len(messages),
+                        size=len(body),
+                        archivedAt=datetime.now(timezone.utc),
+                    )
+                )
+            except RecordAlreadyExists:
+                pass
+            # the marker lets the change stream tell archiving from user deletes
+            message_ids = [m["_id"] for m in messages]
+            await self.messages.mark_archived(message_ids)
+            await self.messages.delete_many(message_ids)
+
+            archived += len(messages)
+            if len(messages) < settings.archive.SEGMENT_SIZE:
+                return archived
+
+    async def archive(self, older_than: Optional[timedelta] = None) -> int:
+        older_than = older_than or timedelta(days=settings.archive.AGE_DAYS)
+        cutoff = ObjectId.from_datetime(datetime.now(timezone.utc) - older_than)
+
+        archived = 0
+        for conv_id in await self.messages.conversations_before(cutoff):
+            archived += await self.archive_conversation(conv_id, cutoff)
+        return archived
+
+
+message_archive = MessageArchive()
@@ -114,3 +114,25 @@ class AWSManager:
             return url
         except AWSError as e:
             raise AWSDownloadError(str(e)) from e
+
+    async def put_object(self, key: str, body: bytes, content_type: str) -> None:
+        client = await self._create_s3_client()
+        try:
+            await client.put_object(  # type: ignore
+                Bucket=settings.aws.bucket, Key=key, Body=body, ContentType=content_type
+            )
+        except ClientError as e:
+            raise AWSUploadError(f"Failed to put object: {e}") from e
+        finally:
+            await self._exit_stack.aclose()
+
+    async def get_object(self, key: str) -> bytes:
+        client = await self._create_s3_client()
+        try:
+            resp = await client.get_object(Bucket=settings.aws.bucket, Key=key)  # type: ignore
+            async with resp["Body"] as stream:
+                return await stream.read()
+        except ClientError as e:
+            raise AWSDownloadError(f"Failed to get object: {e}") from e
+        finally:
+            await self._exit_stack.aclose()
@@ -1,12 +1,211 @@
-from typing import List, Optional
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from typing import DefaultDict, List, Optional, Set, Tuple
 
 import redis.asyncio as redis
 from bson import ObjectId
 from redis.asyncio.client import Redis as AsyncRedis
 
 from app.config import settings
+from app.enum import WriteMode
 from app.kafka.serializers import JSONCodec
 from app.schemas.message import MessageUpdate
+from app.services.message import MessageService
+
+_PendingWrite = Tuple[dict, asyncio.Future]
+
+RATE_LIMIT_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000))
+return allowed
+"""
+
+
+# a missing counter is seeded from mongo first, INCRBY alone would restart at 1
+SEQ_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return false
+end
+return redis.call("INCRBY", KEYS[1], ARGV[1])
+"""
+
+
+# keys are built in the script, fine for a single redis but not for cluster mode
+INBOX_SCRIPT = """
+local members = redis.call("SMEMBERS", KEYS[1])
+redis.call("SET", KEYS[2], ARGV[3], "EX", ARGV[4])
+
+local own = {}
+for i = 5, #ARGV do
+    own[ARGV[i]] = (own[ARGV[i]] or 0) + 1
+end
+local total = #ARGV - 4
+
+for _, user_id in ipairs(members) do
+    local inbox = "user:" .. user_id .. ":inbox"
+    if redis.call("EXISTS", inbox) == 1 then
+        redis.call("ZADD", inbox, "GT", ARGV[2], ARGV[1])
+    end
+    local unread = total - (own[user_id] or 0)
+    if unread > 0 then
+        redis.call("HINCRBY", "user:" .. user_id .. ":unread", ARGV[1], unread)
+    end
+end
+return #members
+"""
+
+# read positions only move forward, same-length hex ids compare like ObjectIds.
+# Unread drops to what follows the marked message: the seq gap when both seqs
+# are known, otherwise zero only once the latest message is marked. The counter
+# skips the reader's own messages, so it is never raised here
+READ_MARKER_SCRIPT = """
+local current = redis.call("HGET", KEYS[1], ARGV[1])
+if current and current >= ARGV[2] then
+    return 0
+end
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+redis.call("SADD", KEYS[3], ARGV[3] .. ":" .. ARGV[1])
+
+local remaining = nil
+local last_seq = tonumber(redis.call("GET", KEYS[4]))
+local read_seq = tonumber(ARGV[4])
+if last_seq and read_seq then
+    remaining = math.max(0, last_seq - read_seq)
+else
+    local last = redis.call("GET", KEYS[5])
+    if last and ARGV[2] >= cjson.decode(last)["id"] then
+        remaining = 0
+    end
+end
+
+if remaining then
+    local unread = tonumber(redis.call("HGET", KEYS[2], ARGV[3])) or 0
+    if remaining == 0 then
+        redis.call("HDEL", KEYS[2], ARGV[3])
+    elseif remaining < unread then
+        redis.call("HSET", KEYS[2], ARGV[3], remaining)
+    end
+end
+return 1
+"""
+
+
+# persisted history is a contiguous run of the newest messages, ids are kept in a
+# lex-ordered zset next to a hash of documents. Only runs that already exist are
+# extended and the generation counter tells readers a write raced their fill
+HISTORY_APPEND_SCRIPT = """
+redis.call("INCR", KEYS[3])
+redis.call("EXPIRE", KEYS[3], ARGV[2])
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+
+local floor = redis.call("ZRANGE", KEYS[1], 0, 0)[1]
+local complete = redis.call("HEXISTS", KEYS[2], "complete") == 1
+for i = 3, #ARGV, 2 do
+    if complete or ARGV[i] > floor then
+        redis.call("ZADD", KEYS[1], 0, ARGV[i])
+        redis.call("HSET", KEYS[2], ARGV[i], ARGV[i + 1])
+    end
+end
+
+local extra = redis.call("ZCARD", KEYS[1]) - tonumber(ARGV[1])
+if extra > 0 then
+    local dropped = redis.call("ZRANGE", KEYS[1], 0, extra - 1)
+    redis.call("ZREMRANGEBYRANK", KEYS[1], 0, extra - 1)
+    redis.call("HDEL", KEYS[2], "complete", unpack(dropped))
+end
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+redis.call("EXPIRE", KEYS[2], ARGV[2])
+return 1
+"""
+
+HISTORY_FILL_SCRIPT = """
+if (redis.call("GET", KEYS[3]) or "") ~= ARGV[3] then
+    return 0
+end
+
+redis.call("DEL", KEYS[1], KEYS[2])
+for i = 4, #ARGV, 2 do
+    redis.call("ZADD", KEYS[1], 0, ARGV[i])
+    redis.call("HSET", KEYS[2], ARGV[i], ARGV[i + 1])
+end
+if ARGV[2] == "1" then
+    redis.call("HSET", KEYS[2], "complete", 1)
+end
+redis.call("EXPIRE", KEYS[1], ARGV[1])
+redis.call("EXPIRE", KEYS[2], ARGV[1])
+return 1
+"""
+
+# a page is served only when the run covers it, either fully or down to the
+# first message of the conversation
+HISTORY_READ_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return false
+end
+
+local limit = tonumber(ARGV[1])
+local ids
+if ARGV[2] == "" then
+    ids = redis.call("ZREVRANGE", KEYS[1], 0, limit - 1)
+else
+    ids = redis.call("ZREVRANGEBYLEX", KEYS[1], "(" .. ARGV[2], "-", "LIMIT", 0, limit)
+end
+if #ids < limit and redis.call("HEXISTS", KEYS[2], "complete") == 0 then
+    return false
+end
+
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+if #ids == 0 then
+    return {}
+end
+
+local docs = redis.call("HMGET", KEYS[2], unpack(ids))
+for i = 1, #ids do
+    if not docs[i] then
+        return false
+    end
+end
+return docs
+"""
+
+
+def message_preview(message: dict) -> dict:
+    content = message.get("content") or {}
+    text = content.get("text")
+    return {
+        "id": str(message.get("_id")),
+        "authorId": message.get("authorId"),
+        "type": content.get("type"),
+        "text": text[: settings.chat.PREVIEW_LENGTH] if text else text,
+        "attachments": len(content.get("attachments") or []),
+        "seq": message.get("seq"),
+    }
+
+
+def _stream_id(entry_id: str) -> Tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
 
 
 class RedisManager:
@@ -29,26 +228,333 @@ class RedisManager:
             await self._redis.aclose()
         self._redis = None
 
-    async def add_message(self, chat_key: str, message: dict) -> None:
+    def _list_keys(self, conv_id: str) -> List[str]:
+        # direct mode still buffers in :messages while kafka is unavailable
+        if settings.chat.WRITE_MODE == WriteMode.DIRECT:
+            return [f"chat:{conv_id}:tail", f"chat:{conv_id}:messages"]
+        return [f"chat:{conv_id}:messages"]
+
+    def _history_keys(self, conv_id: str) -> List[str]:
+        return [
+            f"chat:{conv_id}:history",
+            f"chat:{conv_id}:history:docs",
+            f"chat:{conv_id}:history:gen",
+        ]
+
+    async def acquire_token(self, key: str, rate: float, burst: int) -> bool:
+        if not self._redis:
+            return True
+
+        script = self._redis.register_script(RATE_LIMIT_SCRIPT)
+        allowed = await script(keys=[f"ratelimit:{key}"], args=[rate, burst])
+        return bool(allowed)
+
+    def _idempotency_key(self, conv_id: str, key: str) -> str:
+        # client keys are hashed so they can never look like another key family
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return f"chat:{conv_id}:idempotency:{digest}"
+
+    async def claim_message_key(
+        self, conv_id: str, key: str, message_id: str
+    ) -> Optional[str]:
+        # returns the canonical id when the key was already used
+        if not self._redis:
+            return None
+
+        return await self._redis.set(
+            self._idempotency_key(conv_id, key),
+            message_id,
+            nx=True,
+            get=True,
+            ex=settings.chat.IDEMPOTENCY_TTL,
+        )
+
+    async def release_message_key(self, conv_id: str, key: str) -> None:
         if not self._redis:
             return
 
-        message_id = str(ObjectId())
-        message["_id"] = message_id
+        await self._redis.delete(self._idempotency_key(conv_id, key))
+
+    async def next_seq(self, conv_id: str, count: int = 1) -> Optional[int]:
+        # returns the last sequence number of the reserved range
+        if not self._redis:
+            return None
+
+        key = f"chat:{conv_id}:seq"
+        script = self._redis.register_script(SEQ_SCRIPT)
+        last = await script(keys=[key], args=[count])
+        if last is not None:
+            return last
+
+        # after a flush or failover the counter has to continue where mongo is
+        await self._redis.set(key, await MessageService().max_seq(conv_id), nx=True)
+        return await self._redis.incrby(key, count)
+
+    async def _assign_seq(self, conv_id: str, messages: List[dict]) -> None:
+        unassigned = [m for m in messages if m.get("seq") is None]
+        if not unassigned:
+            return
+
+        last = await self.next_seq(conv_id, len(unassigned))
+        if last is None:
+            return
+        for seq, message in enumerate(unassigned, start=last - len(unassigned) + 1):
+            message["seq"] = seq
+
+    async def add_message(self, chat_key: str, message: dict) -> None:
+        await self.add_messages(chat_key, [message])
+
+    async def add_messages(self, chat_key: str, messages: List[dict]) -> None:
+        if not self._redis or not messages:
+            return
+
+        await self._assign_seq(chat_key, messages)
 
-        message_json = JSONCodec().dumps(message)
         key_list = f"chat:{chat_key}:messages"
-        key_msg = f"chat:{chat_key}:messages:{message_id}"
-        await self._redis.rpush(key_list, message_id)  # type: ignore
-        await self._redis.set(key_msg, message_json)
+        message_ids = []
+
+        pipeline = self._redis.pipeline()
+        for message in messages:
+            message_id = message.setdefault("_id", str(ObjectId()))
+            message_json = JSONCodec().dumps(message)
+            pipeline.set(f"{key_list}:{message_id}", message_json)
+            self._log_change(pipeline, chat_key, "create", message_id, message_json)
+            message_ids.append(message_id)
+        pipeline.rpush(key_list, *message_ids)
+        await self._touch_inbox(pipeline, chat_key, messages)
+        await pipeline.execute()
+
+    async def add_tail_message(self, chat_key: str, message: dict) -> None:
+        await self.add_tail_messages(chat_key, [message])
+
+    async def add_tail_messages(self, chat_key: str, messages: List[dict]) -> None:
+        # direct mode: messages are already in kafka, keep only a capped tail for reads
+        if not self._redis or not messages:
+            return
+
+        await self._assign_seq(chat_key, messages)
+
+        key_list = f"chat:{chat_key}:tail"
+        message_ids = []
+
+        pipeline = self._redis.pipeline()
+        for message in messages:
+            message_id = message.setdefault("_id", str(ObjectId()))
+            message_json = JSONCodec().dumps(message)
+            pipeline.set(
+                f"chat:{chat_key}:messages:{message_id}",
+                message_json,
+                ex=settings.chat.TAIL_TTL,
+            )
+            self._log_change(pipeline, chat_key, "create", message_id, message_json)
+            message_ids.append(message_id)
+        pipeline.rpush(key_list, *message_ids)
+        pipeline.ltrim(key_list, -settings.chat.TAIL_SIZE, -1)
+        pipeline.expire(key_list, settings.chat.TAIL_TTL)
+        await self._touch_inbox(pipeline, chat_key, messages)
+        await pipeline.execute()
+
+    async def _touch_inbox(self, pipeline, conv_id: str, messages: List[dict]) -> None:
+        # bumps the conversation in every participant's inbox, caches the preview
+        # and counts the messages as unread for everyone but their authors
+        script = self._redis.register_script(INBOX_SCRIPT)
+        await script(
+            keys=[f"chat:{conv_id}:participants", f"chat:{conv_id}:last"],
+            args=[
+                conv_id,
+                int(time.time() * 1000),
+                JSONCodec().dumps(message_preview(messages[-1])),
+                settings.chat.INBOX_TTL,
+                *(message["authorId"] for message in messages),
+            ],
+            client=pipeline,
+        )
+
+    async def set_participants(self, conv_id: str, participants: List[int]) -> None:
+        if not self._redis or not participants:
+            return
+
+        key = f"chat:{conv_id}:participants"
+        pipeline = self._redis.pipeline()
+        pipeline.delete(key)
+        pipeline.sadd(key, *participants)
+        await pipeline.execute()
+
+    async def get_inbox(
+        self, user_id: int, offset: int, limit: int
+    ) -> Optional[List[Tuple[str, int, Optional[dict]]]]:
+        # None means the inbox is not cached and has to be rebuilt
+        if not self._redis:
+            return None
+
+        inbox = f"user:{user_id}:inbox"
+        pipeline = self._redis.pipeline()
+        pipeline.exists(inbox)
+        pipeline.zrevrange(inbox, offset, offset + limit - 1, withscores=True)
+        exists, entries = await pipeline.execute()
+        if not exists:
+            return None
+        if not entries:
+            return []
+
+        previews = await self._redis.mget(
+            [f"chat:{conv_id}:last" for conv_id, _ in entries]
+        )
+        return [
+            (conv_id, int(score), JSONCodec().loads(raw) if raw else None)
+            for (conv_id, score), raw in zip(entries, previews)
+        ]
+
+    async def get_last_messages(self, conv_ids: List[str]) -> List[Optional[dict]]:
+        if not self._redis or not conv_ids:
+            return [None] * len(conv_ids)
+
+        raw = await self._redis.mget([f"chat:{conv_id}:last" for conv_id in conv_ids])
+        return [JSONCodec().loads(r) if r else None for r in raw]
+
+    async def rebuild_inbox(
+        self,
+        user_id: int,
+        entries: List[Tuple[str, int, List[int], Optional[dict]]],
+    ) -> None:
+        # entries: conversation id, last activity, participants, last message preview
+        if not self._redis:
+            return
+
+        inbox = f"user:{user_id}:inbox"
+        pipeline = self._redis.pipeline()
+        pipeline.delete(inbox)
+        if entries:
+            pipeline.zadd(inbox, {conv_id: score for conv_id, score, _, _ in entries})
+            pipeline.expire(inbox, settings.chat.INBOX_TTL)
+        for conv_id, _, participants, preview in entries:
+            if participants:
+                # replace, members who left must stop getting the conversation
+                pipeline.delete(f"chat:{conv_id}:participants")
+                pipeline.sadd(f"chat:{conv_id}:participants", *participants)
+            if preview:
+                pipeline.set(
+                    f"chat:{conv_id}:last",
+                    JSONCodec().dumps(preview),
+                    ex=settings.chat.INBOX_TTL,
+                    nx=True,
+                )
+        await pipeline.execute()
+
+    async def mark_read(
+        self, conv_id: str, user_id: int, message_id: str, seq: Optional[int] = None
+    ) -> bool:
+        if not self._redis:
+            return False
+
+        script = self._redis.register_script(READ_MARKER_SCRIPT)
+        moved = await script(
+            keys=[
+                f"chat:{conv_id}:reads",
+                f"user:{user_id}:unread",
+                "reads:dirty",
+                f"chat:{conv_id}:seq",
+                f"chat:{conv_id}:last",
+            ],
+            args=[user_id, message_id, conv_id, "" if seq is None else seq],
+        )
+        return bool(moved)
+
+    async def get_unread(self, user_id: int, conv_ids: List[str]) -> List[int]:
+        if not self._redis or not conv_ids:
+            return [0] * len(conv_ids)
+
+        counts = await self._redis.hmget(f"user:{user_id}:unread", conv_ids)
+        return [int(count) if count else 0 for count in counts]
+
+    async def get_read_positions(self, conv_id: str) -> dict:
+        if not self._redis:
+            return {}
+
+        return await self._redis.hgetall(f"chat:{conv_id}:reads")
+
+    async def pop_dirty_reads(self, count: int) -> List[Tuple[str, int, str]]:
+        # conversation id, user id, read message id
+        if not self._redis:
+            return []
+
+        members = await self._redis.spop("reads:dirty", count)
+        if not members:
+            return []
+
+        pipeline = self._redis.pipeline()
+        pairs = []
+        for member in members:
+            conv_id, _, user_id = member.rpartition(":")
+            pairs.append((conv_id, user_id))
+            pipeline.hget(f"chat:{conv_id}:reads", user_id)
+        positions = await pipeline.execute()
+
+        return [
+            (conv_id, int(user_id), message_id)
+            for (conv_id, user_id), message_id in zip(pairs, positions)
+            if message_id
+        ]
+
+    async def restore_dirty_reads(self, reads: List[Tuple[str, int, str]]) -> None:
+        if not self._redis or not reads:
+            return
+
+        await self._redis.sadd(
+            "reads:dirty", *[f"{conv_id}:{user_id}" for conv_id, user_id, _ in reads]
+        )
+
+    async def invalidate_inboxes(self, user_ids: List[int]) -> None:
+        if not self._redis or not user_ids:
+            return
+
+        await self._redis.delete(*[f"user:{user_id}:inbox" for user_id in user_ids])
+
+    async def search_messages(
+        self, conv_ids: List[str], terms: List[str], scan: int
+    ) -> List[dict]:
+        # plain substring match over the newest cached messages of each conversation
+        if not self._redis or not conv_ids or not terms:
+            return []
+
+        pipeline = self._redis.pipeline()
+        owners = []
+        for conv_id in conv_ids:
+            for key_list in self._list_keys(conv_id):
+                pipeline.lrange(key_list, -scan, -1)
+                owners.append(conv_id)
+        id_lists = await pipeline.execute()
+
+        keys = list(
+            dict.fromkeys(
+                f"chat:{conv_id}:messages:{message_id}"
+                for conv_id, ids in zip(owners, id_lists)
+                for message_id in ids
+            )
+        )
+        if not keys:
+            return []
+
+        hits = []
+        for raw in await self._redis.mget(keys):
+            if not raw:
+                continue
+            message = JSONCodec().loads(raw)
+            text = ((message.get("content") or {}).get("text") or "").lower()
+            if all(term in text for term in terms):
+                hits.append(message)
+        return hits
 
     async def get_messages(self, conv_id: str, batch_size: int) -> List[dict]:
         if not self._redis:
             return []
 
-        key_list = f"chat:{conv_id}:messages"
+        pipeline = self._redis.pipeline()
+        for key_list in self._list_keys(conv_id):
+            pipeline.lrange(key_list, -batch_size, -1)
+        id_lists = await pipeline.execute()
 
-        message_ids = await self._redis.lrange(key_list, -batch_size, -1)  # type: ignore
+        message_ids = sorted({i for ids in id_lists for i in ids})[-batch_size:]
 
         if not message_ids:
             return []
@@ -60,7 +566,7 @@ class RedisManager:
 
         messages = await pipeline.execute()
 
-        return [JSONCodec().loads(m) for m in messages]
+        return [JSONCodec().loads(m) for m in messages if m]
 
     async def get_batch(
         self, cursor: int = 0, count: int = 10
@@ -109,11 +615,12 @@ class RedisManager:
         if not self._redis:
             return
 
-        key_list = f"chat:{conv_id}:messages"
         key_msg = f"chat:{conv_id}:messages:{message_id}"
 
-        await self._redis.lrem(key_list, 1, message_id)  # type: ignore
+        for key_list in self._list_keys(conv_id):
+            await self._redis.lrem(key_list, 1, message_id)  # type: ignore
         await self._redis.delete(key_msg)
+        await self.log_change(conv_id, "delete", message_id)
 
     async def get_message(self, conv_id: str, message_id: str) -> Optional[dict]:
         if not self._redis:
@@ -145,5 +652,305 @@ class RedisManager:
         data_dict = data.model_dump()
         message["content"] = data_dict["content"]
 
-        await self._redis.set(key_msg, JSONCodec().dumps(message))
+        message_json = JSONCodec().dumps(message)
+        pipeline = self._redis.pipeline()
+        pipeline.set(key_msg, message_json)
+        self._log_change(pipeline, conv_id, "update", message_id, message_json)
+        await pipeline.execute()
         return message
+
+    async def refresh_message(self, conv_id: str, message: dict) -> None:
+        # keeps cached copies in line with an edit made directly in mongo
+        if not self._redis:
+            return
+
+        message_id = str(message["_id"])
+        pipeline = self._redis.pipeline()
+        pipeline.set(
+            f"chat:{conv_id}:messages:{message_id}",
+            JSONCodec().dumps({**message, "source": "cache"}),
+            xx=True,
+            keepttl=True,
+        )
+        pipeline.hexists(self._history_keys(conv_id)[1], message_id)
+        _, in_history = await pipeline.execute()
+        if in_history:
+            await self._redis.hset(
+                self._history_keys(conv_id)[1],
+                message_id,
+                JSONCodec().dumps({**message, "source": "db"}),
+            )
+        await self._refresh_preview(conv_id, message_id, message)
+
+    async def evict_message(self, conv_id: str, message_id: str) -> None:
+        if not self._redis:
+            return
+
+        history, docs, _ = self._history_keys(conv_id)
+        pipeline = self._redis.pipeline()
+        for key_list in self._list_keys(conv_id):
+            pipeline.lrem(key_list, 1, message_id)
+        pipeline.delete(f"chat:{conv_id}:messages:{message_id}")
+        pipeline.zrem(history, message_id)
+        pipeline.hdel(docs, message_id)
+        await pipeline.execute()
+        await self._refresh_preview(conv_id, message_id, None)
+
+    async def _refresh_preview(
+        self, conv_id: str, message_id: str, message: Optional[dict]
+    ) -> None:
+        key = f"chat:{conv_id}:last"
+        raw = await self._redis.get(key)
+        if not raw or JSONCodec().loads(raw).get("id") != message_id:
+            return
+
+        if message is None:
+            # the previous message is not known here, the next rebuild fills it in
+            await self._redis.delete(key)
+        else:
+            await self._redis.set(
+                key, JSONCodec().dumps(message_preview(message)), keepttl=True
+            )
+
+    async def get_history(
+        self, conv_id: str, limit: int, before: Optional[str] = None
+    ) -> Optional[List[dict]]:
+        # newest first, None when the cached run does not cover the page
+        if not self._redis or not settings.chat.HISTORY_CACHE_ENABLED:
+            return None
+
+        script = self._redis.register_script(HISTORY_READ_SCRIPT)
+        docs = await script(
+            keys=self._history_keys(conv_id),
+            args=[limit, before or "", settings.chat.HISTORY_CACHE_TTL],
+        )
+        if docs is None:
+            return None
+        return [JSONCodec().loads(d) for d in docs]
+
+    async def history_generation(self, conv_id: str) -> str:
+        if not self._redis:
+            return ""
+
+        return await self._redis.get(self._history_keys(conv_id)[2]) or ""
+
+    async def fill_history(
+        self, conv_id: str, messages: List[dict], complete: bool, generation: str
+    ) -> bool:
+        if not self._redis or not settings.chat.HISTORY_CACHE_ENABLED:
+            return False
+        if not messages:  # an empty run can't be stored, the next read retries
+            return False
+
+        script = self._redis.register_script(HISTORY_FILL_SCRIPT)
+        filled = await script(
+            keys=self._history_keys(conv_id),
+            args=[
+                settings.chat.HISTORY_CACHE_TTL,
+                int(complete),
+                generation,
+                *self._history_args(messages[: settings.chat.HISTORY_CACHE_SIZE]),
+            ],
+        )
+        return bool(filled)
+
+    async def append_history(self, messages: List[dict]) -> None:
+        # called once messages are persisted, keeps warm runs current
+        if not self._redis or not settings.chat.HISTORY_CACHE_ENABLED:
+            return
+
+        grouped: DefaultDict[str, List[dict]] = defaultdict(list)
+        for message in messages:
+            grouped[str(message["conversationId"])].append(message)
+
+        script = self._redis.register_script(HISTORY_APPEND_SCRIPT)
+        pipeline = self._redis.pipeline()
+        for conv_id, conv_messages in grouped.items():
+            await script(
+                keys=self._history_keys(conv_id),
+                args=[
+                    settings.chat.HISTORY_CACHE_SIZE,
+                    settings.chat.HISTORY_CACHE_TTL,
+                    *self._history_args(conv_messages),
+                ],
+                client=pipeline,
+            )
+        await pipeline.execute()
+
+    def _history_args(self, messages: List[dict]) -> List:
+        args = []
+        for message in messages:
+            args.append(str(message["_id"]))
+            args.append(JSONCodec().dumps(message))
+        return args
+
+    async def forget_conversation(self, conv_id: str) -> None:
+        if not self._redis:
+            return
+
+        await self._redis.delete(
+            f"chat:{conv_id}:participants",
+            f"chat:{conv_id}:last",
+            *self._history_keys(conv_id)[:2],
+        )
+
+    async def get_resume_token(self, name: str) -> Optional[dict]:
+        if not self._redis:
+            return None
+
+        raw = await self._redis.get(f"changestream:{name}:token")
+        return JSONCodec().loads(raw) if raw else None
+
+    async def set_resume_token(self, name: str, token: Optional[dict]) -> None:
+        if not self._redis:
+            return
+
+        key = f"changestream:{name}:token"
+        if token is None:
+            await self._redis.delete(key)
+        else:
+            await self._redis.set(key, JSONCodec().dumps(token))
+
+    def _log_change(
+        self,
+        pipeline,
+        conv_id: str,
+        op: str,
+        message_id: str,
+        message_json: Optional[bytes] = None,
+    ) -> None:
+        key_log = f"chat:{conv_id}:changes"
+        fields = {"op": op, "id": message_id}
+        if message_json:
+            fields["data"] = message_json
+
+        pipeline.xadd(
+            key_log, fields, maxlen=settings.chat.CHANGELOG_SIZE, approximate=True
+        )
+        pipeline.expire(key_log, settings.chat.CHANGELOG_TTL)
+
+    async def log_change(
+        self, conv_id: str, op: str, message_id: str, message: Optional[dict] = None
+    ) -> None:
+        if not self._redis:
+            return
+
+        pipeline = self._redis.pipeline()
+        self._log_change(
+            pipeline,
+            conv_id,
+            op,
+            message_id,
+            JSONCodec().dumps(message) if message else None,
+        )
+        await pipeline.execute()
+
+    async def get_changes(
+        self, conv_id: str, since: str, count: int
+    ) -> Optional[List[Tuple[str, dict]]]:
+        # None means changes after the checkpoint may have been trimmed from the log
+        if not self._redis:
+            return None
+
+        since_id = _stream_id(since)
+        if since_id[0] < (time.time() - settings.chat.CHANGELOG_TTL) * 1000:
+            return None
+
+        key_log = f"chat:{conv_id}:changes"
+
+        pipeline = self._redis.pipeline()
+        pipeline.xinfo_stream(key_log)
+        pipeline.xrange(key_log, min=f"({since}", max="+", count=count)
+        info, entries = await pipeline.execute(raise_on_error=False)
+
+        if isinstance(info, Exception):  # no log: nothing changed within the ttl
+            return []
+
+        trimmed = info.get("entries-added") != info["length"]
+        first = info.get("first-entry")
+        if trimmed and first and _stream_id(first[0]) > since_id:
+            return None
+
+        return entries
+
+    async def get_last_change_id(self, conv_id: str) -> Optional[str]:
+        if not self._redis:
+            return None
+
+        latest = await self._redis.xrevrange(f"chat:{conv_id}:changes", count=1)
+        return latest[0][0] if latest else None
+
+
+class RedisWriteCoalescer:
+    def __init__(
+        self,
+        redis: RedisManager,
+        window: float = settings.redis.COALESCE_WINDOW,
+        max_batch: int = settings.redis.COALESCE_MAX_BATCH,
+    ) -> None:
+        self.redis = redis
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: DefaultDict[Tuple[bool, str], List[_PendingWrite]] = defaultdict(
+            list
+        )
+        self._size = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def add_message(self, chat_key: str, message: dict) -> None:
+        await self._enqueue(chat_key, message, tail=False)
+
+    async def add_tail_message(self, chat_key: str, message: dict) -> None:
+        await self._enqueue(chat_key, message, tail=True)
+
+    async def flush(self) -> None:
+        self._flush_pending()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _enqueue(self, chat_key: str, message: dict, tail: bool) -> None:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+
+        self._pending[(tail, chat_key)].append((message, fut))
+        self._size += 1
+
+        if self._size >= self.max_batch:
+            self._flush_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_pending)
+
+        await fut
+
+    def _flush_pending(self) -> None:
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+
+        pending, self._pending = self._pending, defaultdict(list)
+        self._size = 0
+
+        for (tail, chat_key), writes in pending.items():
+            task = asyncio.create_task(self._write(chat_key, writes, tail))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _write(
+        self, chat_key: str, writes: List[_PendingWrite], tail: bool
+    ) -> None:
+        messages = [message for message, _ in writes]
+        try:
+            if tail:
+                await self.redis.add_tail_messages(chat_key, messages)
+            else:
+                await self.redis.add_messages(chat_key, messages)
+        except Exception as exc:
+            for _, fut in writes:
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+
+        for _, fut in writes:
+            if not fut.done():
+                fut.set_result(None)
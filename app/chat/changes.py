@@ -0,0 +1,186 @@
+import asyncio
+import logging
+from typing import Optional, Set
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.cache import RedisManager
+from app.db.mongo import mongo_db
+from app.types.lifecycle import LifecycleT
+
+logger = logging.getLogger(__name__)
+
+# ChangeStreamHistoryLost, InvalidResumeToken, ChangeStreamFatalError
+_STALE_TOKEN_CODES = {260, 280, 286}
+
+_PIPELINE = [
+    {
+        "$match": {
+            "$or": [
+                # inserts come from the kafka consumer, clients already have them
+                {
+                    "ns.coll": "messages",
+                    "operationType": {"$in": ["update", "replace", "delete"]},
+                    # archiving marks messages before deleting them
+                    "updateDescription.updatedFields.archived": {"$exists": False},
+                },
+                {
+                    "ns.coll": "conversations",
+                    "operationType": {"$in": ["insert", "update", "replace", "delete"]},
+                },
+            ]
+        }
+    }
+]
+
+
+def _to_json(document: dict) -> dict:
+    return jsonable_encoder(document, custom_encoder={ObjectId: str})
+
+
+class ChangeStreamListener(LifecycleT):
+    def __init__(self, redis: RedisManager, chat, name: str = "chat") -> None:
+        self.redis = redis
+        self.chat = chat
+        self.name = name
+        self._task: Optional[asyncio.Task] = None
+        super().__init__()
+
+    async def start(self) -> None:
+        if not self._closed:
+            return
+
+        await self._enable_pre_images()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._ready.clear()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _enable_pre_images(self) -> None:
+        # deletes only carry the document key, the pre-image tells the conversation
+        for collection in ("messages", "conversations"):
+            try:
+                await mongo_db._db.command(
+                    {
+                        "collMod": collection,
+                        "changeStreamPreAndPostImages": {"enabled": True},
+                    }
+                )
+            except PyMongoError as e:
+                logger.warning("Pre-images not enabled for %s: %s", collection, e)
+
+    async def _run(self) -> None:
+        delay = 1
+        while not self._closed:
+            try:
+                await self._watch()
+                delay = 1
+            except OperationFailure as e:
+                if e.code in _STALE_TOKEN_CODES:
+                    logger.warning("Resume token no longer valid, starting from now")
+                    await self._reset_resume_token()
+                else:
+                    logger.warning("Change stream failed: %s", e)
+            except Exception:
+                # resume tokens live in redis, its errors must not end the task
+                logger.exception("Change stream failed")
+
+            self._ready.clear()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def _reset_resume_token(self) -> None:
+        try:
+            await self.redis.set_resume_token(self.name, None)
+        except Exception:
+            logger.exception("Failed to reset the resume token")
+
+    async def _watch(self) -> None:
+        token = await self.redis.get_resume_token(self.name)
+
+        async with mongo_db._db.watch(
+            _PIPELINE,
+            full_document="updateLookup",
+            full_document_before_change="whenAvailable",
+            resume_after=token,
+        ) as stream:
+            self._ready.set()
+            async for change in stream:
+                try:
+                    await self._handle(change)
+                except Exception:
+                    logger.exception("Failed to handle change %s", change.get("_id"))
+                await self.redis.set_resume_token(self.name, stream.resume_token)
+
+    async def _handle(self, change: dict) -> None:
+        if change["ns"]["coll"] == "messages":
+            await self._handle_message(change)
+        else:
+            await self._handle_conversation(change)
+
+    async def _handle_message(self, change: dict) -> None:
+        message_id = str(change["documentKey"]["_id"])
+
+        if change["operationType"] == "delete":
+            before = change.get("fullDocumentBeforeChange")
+            if not before or before.get("archived"):
+                return
+
+            conv_id = str(before["conversationId"])
+            await self.redis.evict_message(conv_id, message_id)
+            await self.chat.broadcast(
+                conv_id,
+                "message_deleted",
+                {"conversation_id": conv_id, "id": message_id},
+            )
+            return
+
+        document = change.get("fullDocument")
+        if not document:  # deleted before the lookup ran
+            return
+
+        message = {**_to_json(document), "source": "db"}
+        conv_id = message["conversationId"]
+        await self.redis.refresh_message(conv_id, message)
+        await self.chat.broadcast(conv_id, "message_updated", message)
+
+    async def _handle_conversation(self, change: dict) -> None:
+        conv_id = str(change["documentKey"]["_id"])
+
+        affected: Set[int] = set()
+        for image in ("fullDocumentBeforeChange", "fullDocument"):
+            affected.update((change.get(image) or {}).get("participants", []))
+
+        document = change.get("fullDocument")
+        if change["operationType"] == "delete" or not document:
+            await self.redis.forget_conversation(conv_id)
+        else:
+            await self.redis.set_participants(conv_id, document.get("participants", []))
+
+        # membership or title changed, inboxes are rebuilt on the next read
+        await self.redis.invalidate_inboxes(list(affected))
+
+        if change["operationType"] != "insert":
+            await self.chat.broadcast(
+                conv_id,
+                "conversation_updated",
+                {
+                    "conversation_id": conv_id,
+                    "deleted": change["operationType"] == "delete",
+                    "conversation": _to_json(document) if document else None,
+                },
+            )
@@ -1,19 +1,38 @@
+from typing import Optional
+
 import socketio
+from bson import ObjectId
 from fastapi.encoders import jsonable_encoder
 
 from app.auth.authorization import get_current_user_from_token
-from app.cache import RedisManager
+from app.cache import RedisManager, RedisWriteCoalescer
+from app.chat.packets import ChatSocketServer
+from app.chat.ratelimit import EventRateLimiter
 from app.config import settings
-from app.schemas.message import Attachment, MessageContent, MessageCreate
+from app.enum import WriteMode
+from app.schemas.message import (
+    Attachment,
+    MessageContent,
+    MessageCreate,
+    MessageListAdapter,
+)
 from app.services.conversation import ConversationService
+from app.services.message import MessageService
+from app.types.transport import ProducerT
+from app.utils import load_messages, load_messages_since
 
 
 class ChatServer(socketio.ASGIApp):
-    def __init__(self, redis: RedisManager) -> None:
-        self._sio = socketio.AsyncServer(
+    def __init__(
+        self, redis: RedisManager, producer: Optional[ProducerT] = None
+    ) -> None:
+        self._sio = ChatSocketServer(
             async_mode=settings.socket.ASYNC_MODE, cors_allowed_origins=[]
         )
         self.redis = redis
+        self.writer = RedisWriteCoalescer(redis)
+        self.limiter = EventRateLimiter(redis)
+        self.producer = producer
         self._setup_handlers()
 
         super().__init__(socketio_server=self._sio, socketio_path="")
@@ -23,6 +42,10 @@ class ChatServer(socketio.ASGIApp):
         self._sio.on("disconnect", self._on_disconnect)
         self._sio.on("send_message", self._on_send_message)
         self._sio.on("join_conversation", self._on_join_conversation)
+        self._sio.on("mark_read", self._on_mark_read)
+
+    async def broadcast(self, conversation_id: str, event: str, data: dict) -> None:
+        await self._sio.emit(event, data, room=f"conversation_{conversation_id}")
 
     def _authenticate_user(self, environ: dict):
         token = environ.get("HTTP_AUTHORIZATION")
@@ -36,10 +59,22 @@ class ChatServer(socketio.ASGIApp):
 
     async def _on_disconnect(self, sid: str, environ: dict) -> None:
         await self._sio.get_session(sid)
+        self.limiter.forget(sid)
+
+    async def _check_rate_limit(self, event: str, sid: str, user) -> bool:
+        if await self.limiter.allow(event, sid, user.id):
+            return True
+
+        await self._sio.emit("error", {"message": "Rate limit exceeded"}, to=sid)
+        return False
 
     async def _on_send_message(self, sid: str, conversation_id: str, message: dict):
         session = await self._sio.get_session(sid)
         user = session["user"]
+
+        if not await self._check_rate_limit("send_message", sid, user):
+            return
+
         conversation = await ConversationService().find_one(id=conversation_id)
 
         if not conversation:
@@ -50,6 +85,16 @@ class ChatServer(socketio.ASGIApp):
             await self._sio.emit("error", {"message": "Access denied"}, to=sid)
             return
 
+        message_id = str(ObjectId())
+        idempotency_key = message.get("idempotency_key")
+        if idempotency_key:
+            idempotency_key = f"{user.id}:{str(idempotency_key)[:128]}"
+            canonical_id = await self.redis.claim_message_key(
+                conversation_id, idempotency_key, message_id
+            )
+            if canonical_id:
+                return {"status": "ok", "id": canonical_id, "duplicate": True}
+
         payload = MessageCreate(
             authorId=user.id,
             conversationId=conversation.id,
@@ -60,19 +105,57 @@ class ChatServer(socketio.ASGIApp):
             ),
             source="cache",
         ).model_dump()
+        payload["_id"] = message_id
 
-        await self.redis.add_message(conversation_id, payload)
+        try:
+            await self._store_message(conversation_id, payload)
+        except Exception:
+            if idempotency_key:
+                await self.redis.release_message_key(conversation_id, idempotency_key)
+            raise
 
         await self._sio.emit(
             "new_message",
             jsonable_encoder(payload),
             room=f"conversation_{conversation_id}",
         )
+        return {"status": "ok", "id": message_id, "duplicate": False}
+
+    async def _store_message(self, conversation_id: str, payload: dict) -> None:
+        if settings.chat.WRITE_MODE != WriteMode.DIRECT or not self.producer:
+            await self.writer.add_message(conversation_id, payload)
+            return
 
-    async def _on_join_conversation(self, sid: str, conversation_id: str):
+        # sequence has to be known before the message leaves for kafka
+        payload["seq"] = await self.redis.next_seq(conversation_id)
+        try:
+            fut = await self.producer.send(
+                topic=settings.kafka.topic,
+                key=conversation_id,
+                value=payload,
+                headers=[
+                    ("source", b"chat"),
+                    ("service", b"chat-direct"),
+                    ("version", b"1.0"),
+                ],
+            )
+            await fut
+        except Exception:
+            # kafka unavailable: fall back to the buffered path, drainer picks it up
+            await self.writer.add_message(conversation_id, payload)
+            return
+
+        await self.writer.add_tail_message(conversation_id, payload)
+
+    async def _on_join_conversation(
+        self, sid: str, conversation_id: str, options: Optional[dict] = None
+    ):
         session = await self._sio.get_session(sid)
         user = session["user"]
 
+        if not await self._check_rate_limit("join_conversation", sid, user):
+            return
+
         conversation = await ConversationService().find_one(id=conversation_id)
         if not conversation:
             await self._sio.emit("error", {"message": "Conversation not found"}, to=sid)
@@ -82,7 +165,106 @@ class ChatServer(socketio.ASGIApp):
             await self._sio.emit("error", {"message": "Access denied"}, to=sid)
             return
 
+        options = options or {}
+        last_seen_id = options.get("last_seen_id")
+        last_seen_seq = options.get("last_seen_seq")
+        history = options.get("history")
+
+        if last_seen_id and not ObjectId.is_valid(last_seen_id):
+            last_seen_id = None
+        if not isinstance(last_seen_seq, int):
+            last_seen_seq = None
+        replay = last_seen_id is not None or last_seen_seq is not None
+
         await self._sio.enter_room(sid, f"conversation_{conversation_id}")
+
+        joined: dict = {"conversation_id": str(conversation_id)}
+        if isinstance(history, int) and history > 0 and not replay:
+            messages = await load_messages(
+                MessageService(),
+                self.redis,
+                conversation_id,
+                limit=min(history, settings.chat.JOIN_HISTORY_LIMIT),
+            )
+            joined["messages"] = MessageListAdapter.dump_python(
+                messages, by_alias=True, mode="json"
+            )
+
+        await self._sio.emit("joined_conversation", joined, to=sid)
+
+        if replay:
+            await self._replay_missed(sid, conversation_id, last_seen_id, last_seen_seq)
+
+    async def _on_mark_read(self, sid: str, conversation_id: str, message_id: str):
+        session = await self._sio.get_session(sid)
+        user = session["user"]
+
+        if not await self._check_rate_limit("mark_read", sid, user):
+            return
+
+        if not isinstance(message_id, str) or not ObjectId.is_valid(message_id):
+            await self._sio.emit("error", {"message": "Invalid message id"}, to=sid)
+            return
+
+        conversation = await ConversationService().find_one(
+            id=conversation_id, fields=["participants"]
+        )
+        if not conversation:
+            await self._sio.emit("error", {"message": "Conversation not found"}, to=sid)
+            return
+
+        if user.id not in conversation["participants"]:
+            await self._sio.emit("error", {"message": "Access denied"}, to=sid)
+            return
+
+        message_id = message_id.lower()
+        # the id has to belong to the conversation, a made-up one would pin the marker
+        message = await self.redis.get_message(conversation_id, message_id)
+        if message is None:
+            message = await MessageService().find_one(
+                id=message_id, conversationId=conversation_id, fields=["seq"]
+            )
+        if not message:
+            await self._sio.emit("error", {"message": "Message not found"}, to=sid)
+            return
+
+        if await self.redis.mark_read(
+            conversation_id, user.id, message_id, seq=message.get("seq")
+        ):
+            await self._sio.emit(
+                "read_receipt",
+                {
+                    "conversation_id": str(conversation_id),
+                    "user_id": user.id,
+                    "message_id": message_id,
+                },
+                room=f"conversation_{conversation_id}",
+                skip_sid=sid,
+            )
+        return {"status": "ok"}
+
+    async def _replay_missed(
+        self,
+        sid: str,
+        conversation_id: str,
+        last_seen_id: Optional[str],
+        last_seen_seq: Optional[int],
+    ) -> None:
+        messages, truncated = await load_messages_since(
+            MessageService(),
+            self.redis,
+            conversation_id,
+            last_seen_id=last_seen_id,
+            last_seen_seq=last_seen_seq,
+        )
         await self._sio.emit(
-            "joined_conversation", {"conversation_id": str(conversation_id)}, to=sid
+            "missed_messages",
+            {
+                "conversation_id": str(conversation_id),
+                "messages": MessageListAdapter.dump_python(
+                    messages, by_alias=True, mode="json"
+                ),
+                "truncated": truncated,
+            },
+            to=sid,
         )
@@ -0,0 +1,214 @@
+import asyncio
+from typing import Dict, List, Set, Type
+
+import msgpack
+import socketio
+from engineio import packet as eio_packet
+from prometheus_client import Counter
+from socketio import packet
+from socketio.msgpack_packet import MsgPackPacket
+
+from app.config import settings
+from app.enum import SlowConsumerPolicy
+
+DROPPED_FRAMES = Counter(
+    "socketio_dropped_frames_total",
+    "Total count of outbound frames dropped for slow consumers by policy.",
+    ["policy"],
+)
+
+SLOW_CONSUMER_DISCONNECTS = Counter(
+    "socketio_slow_consumer_disconnects_total",
+    "Total count of clients disconnected for exceeding the outbound queue limit.",
+)
+
+
+class NegotiatedPacket(packet.Packet):
+    # binary frames outside of a binary event can only come from msgpack clients
+    def decode(self, encoded_packet):
+        if not isinstance(encoded_packet, bytes):
+            return super().decode(encoded_packet)
+
+        decoded = msgpack.loads(encoded_packet)
+        self.packet_type = decoded["type"]
+        self.data = decoded.get("data")
+        self.id = decoded.get("id")
+        self.namespace = decoded["nsp"]
+        return 0
+
+
+class NegotiatingManager(socketio.AsyncManager):
+    async def emit(
+        self,
+        event,
+        data,
+        namespace,
+        room=None,
+        skip_sid=None,
+        callback=None,
+        to=None,
+        **kwargs,
+    ):
+        if callback:
+            return await super().emit(
+                event, data, namespace, room, skip_sid, callback, to, **kwargs
+            )
+
+        room = to or room
+        if namespace not in self.rooms:
+            return
+
+        if isinstance(data, tuple):
+            data = list(data)
+        elif data is not None:
+            data = [data]
+        else:
+            data = []
+
+        if not isinstance(skip_sid, list):
+            skip_sid = [skip_sid]
+
+        # encode the frame once per serializer, not once per recipient
+        frames: Dict[Type[packet.Packet], List[eio_packet.Packet]] = {}
+        tasks = []
+        for sid, eio_sid in self.get_participants(namespace, room):
+            if sid in skip_sid:
+                continue
+
+            packet_class = self.server.packet_class_for(eio_sid)
+            if packet_class not in frames:
+                frames[packet_class] = self._encode(
+                    packet_class, namespace, [event, *data]
+                )
+
+            for frame in frames[packet_class]:
+                tasks.append(
+                    asyncio.create_task(self.server._send_eio_packet(eio_sid, frame))
+                )
+
+        if tasks:
+            await asyncio.wait(tasks)
+
+    def _encode(
+        self, packet_class: Type[packet.Packet], namespace: str, data: list
+    ) -> List[eio_packet.Packet]:
+        encoded = packet_class(packet.EVENT, namespace=namespace, data=data).encode()
+        if not isinstance(encoded, list):
+            encoded = [encoded]
+        return [eio_packet.Packet(eio_packet.MESSAGE, p) for p in encoded]
+
+
+class ChatSocketServer(socketio.AsyncServer):
+    def __init__(
+        self,
+        max_queue_size: int = settings.socket.MAX_QUEUE_SIZE,
+        slow_consumer_policy: SlowConsumerPolicy = settings.socket.SLOW_CONSUMER_POLICY,
+        **kwargs,
+    ) -> None:
+        super().__init__(
+            client_manager=NegotiatingManager(), serializer=NegotiatedPacket, **kwargs
+        )
+        self.max_queue_size = max_queue_size
+        self.slow_consumer_policy = slow_consumer_policy
+        self._msgpack_eio_sids: Set[str] = set()
+        self._evicting: Set[str] = set()
+
+    def packet_class_for(self, eio_sid: str) -> Type[packet.Packet]:
+        if eio_sid in self._msgpack_eio_sids:
+            return MsgPackPacket
+        return self.packet_class
+
+    async def _send_packet(self, eio_sid, pkt):
+        packet_class = self.packet_class_for(eio_sid)
+        if type(pkt) is not packet_class:
+            pkt = packet_class(
+                pkt.packet_type, data=pkt.data, namespace=pkt.namespace, id=pkt.id
+            )
+        await super()._send_packet(eio_sid, pkt)
+
+    async def _send_eio_packet(self, eio_sid, eio_pkt):
+        # engine.io queues are unbounded, cap them here so a slow peer never
+        # grows memory or holds up the emit path
+        socket = self.eio.sockets.get(eio_sid)
+        if socket is None or socket.queue.qsize() < self.max_queue_size:
+            await super()._send_eio_packet(eio_sid, eio_pkt)
+            return
+
+        DROPPED_FRAMES.labels(policy=self.slow_consumer_policy.value).inc()
+
+        if self.slow_consumer_policy == SlowConsumerPolicy.DISCONNECT:
+            self._evict(eio_sid)
+            return
+
+        if self._is_binary_part(eio_sid, eio_pkt):
+            self._evict(eio_sid)
+            return
+
+        try:
+            oldest = socket.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            oldest = eio_pkt
+        else:
+            socket.queue.task_done()
+
+        if oldest is None:  # close sentinel for the writer task, keep it
+            socket.queue.put_nowait(None)
+            return
+
+        if self._is_binary_part(eio_sid, oldest):
+            # dropping a header or attachment alone corrupts the stream
+            self._evict(eio_sid)
+            return
+
+        await super()._send_eio_packet(eio_sid, eio_pkt)
+
+    def _is_binary_part(self, eio_sid: str, eio_pkt: eio_packet.Packet) -> bool:
+        # text clients get a binary event as a header frame plus one frame per
+        # attachment, msgpack clients get it in one frame
+        if eio_sid in self._msgpack_eio_sids:
+            return False
+        if isinstance(eio_pkt.data, bytes):
+            return True
+        return isinstance(eio_pkt.data, str) and eio_pkt.data[:1] in (
+            str(packet.BINARY_EVENT),
+            str(packet.BINARY_ACK),
+        )
+
+    def _evict(self, eio_sid: str) -> None:
+        socket = self.eio.sockets.get(eio_sid)
+        if socket is None or eio_sid in self._evicting:
+            return
+
+        self._evicting.add(eio_sid)
+        SLOW_CONSUMER_DISCONNECTS.inc()
+
+        # a graceful close waits for the backlog to drain, which a slow peer
+        # never does: drop it and wake the writer so it closes the transport
+        while True:
+            try:
+                socket.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            socket.queue.task_done()
+        socket.queue.put_nowait(None)
+
+        def _evicted(_):
+            self.eio.sockets.pop(eio_sid, None)
+            self._evicting.discard(eio_sid)
+
+        # the client resyncs through join_conversation replay after reconnecting
+        task = asyncio.create_task(
+            socket.close(
+                wait=False, abort=True, reason=self.eio.reason.SERVER_DISCONNECT
+            )
+        )
+        task.add_done_callback(_evicted)
+
+    async def _handle_eio_message(self, eio_sid, data):
+        if isinstance(data, bytes) and eio_sid not in self._binary_packet:
+            self._msgpack_eio_sids.add(eio_sid)
+        await super()._handle_eio_message(eio_sid, data)
+
+    async def _handle_eio_disconnect(self, eio_sid, reason):
+        await super()._handle_eio_disconnect(eio_sid, reason)
+        self._msgpack_eio_sids.discard(eio_sid)
@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from app.cache import RedisManager
+from app.config import RateLimitRule, settings
+from app.enum import RateLimitBackend
+
+_Bucket = Tuple[float, float]
+
+
+class LocalTokenBucket:
+    def __init__(
+        self,
+        max_owners: int = settings.rate_limit.MAX_LOCAL_BUCKETS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_owners = max_owners
+        self.clock = clock
+        # least recently used owner first, it is the one evicted when full
+        self._buckets: OrderedDict[str, Dict[str, _Bucket]] = OrderedDict()
+
+    def acquire(self, owner: str, event: str, rule: RateLimitRule) -> bool:
+        now = self.clock()
+
+        buckets = self._buckets.get(owner)
+        if buckets is None:
+            if len(self._buckets) >= self.max_owners:
+                self._buckets.popitem(last=False)
+            buckets = self._buckets[owner] = {}
+        else:
+            self._buckets.move_to_end(owner)
+
+        tokens, ts = buckets.get(event, (rule.burst, now))
+        tokens = min(rule.burst, tokens + (now - ts) * rule.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        buckets[event] = (tokens, now)
+        return allowed
+
+    def forget(self, owner: str) -> None:
+        self._buckets.pop(owner, None)
+
+
+class EventRateLimiter:
+    def __init__(self, redis: Optional[RedisManager] = None) -> None:
+        self.redis = redis
+        self.local = LocalTokenBucket()
+        self.sid_limits = settings.rate_limit.SID_LIMITS
+        self.user_limits = settings.rate_limit.USER_LIMITS
+        self.shared = settings.rate_limit.BACKEND == RateLimitBackend.REDIS
+
+    async def allow(self, event: str, sid: str, user_id: int) -> bool:
+        # sids live on a single worker, only user buckets need to be shared
+        sid_rule = self.sid_limits.get(event)
+        if sid_rule and not self.local.acquire(f"sid:{sid}", event, sid_rule):
+            return False
+
+        user_rule = self.user_limits.get(event)
+        if not user_rule:
+            return True
+
+        if self.shared and self.redis:
+            return await self.redis.acquire_token(
+                f"user:{user_id}:{event}", user_rule.rate, user_rule.burst
+            )
+        return self.local.acquire(f"user:{user_id}", event, user_rule)
+
+    def forget(self, sid: str) -> None:
+        self.local.forget(f"sid:{sid}")
@@ -1,8 +1,10 @@
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from app.enum import RateLimitBackend, ReadPreference, SlowConsumerPolicy, WriteMode
+
 
 class PostgresSettings(BaseModel):
     host: str
@@ -40,12 +42,15 @@ class AuthSettings(BaseModel):
 
 class AppSettings(BaseModel):
     debug: bool
+    ENSURE_INDEXES: bool = True
 
 
 class SocketSettings(BaseModel):
     PATH: str
     ASYNC_MODE: str
     CORS_ALLOWED_ORIGINS: Union[str, list]
+    MAX_QUEUE_SIZE: int = 256
+    SLOW_CONSUMER_POLICY: SlowConsumerPolicy = SlowConsumerPolicy.DROP_OLDEST
 
 
 class MongoSettings(BaseModel):
@@ -54,6 +59,14 @@ class MongoSettings(BaseModel):
     database: str
     username: str
     password: str
+    MAX_POOL_SIZE: int = 100
+    MIN_POOL_SIZE: int = 0
+    WAIT_QUEUE_TIMEOUT_MS: Optional[int] = None
+    READ_PREFERENCE: ReadPreference = ReadPreference.PRIMARY_PREFERRED
+    HISTORY_READ_PREFERENCE: ReadPreference = ReadPreference.SECONDARY_PREFERRED
+    READ_CONCERN: str = "local"
+    CHANGE_STREAM_ENABLED: bool = True
+    CHANGE_STREAM_NAME: str = "chat"
 
 
 class CORSSettings(BaseModel):
@@ -76,6 +89,8 @@ class KafkaSettings(BaseModel):
     group_id: str
     auto_offset_reset: str
     buffer_max_messages: int
+    topic: str = "chat-messages"
+    LINGER: float = 0.005
 
 
 class RedisSettings(BaseModel):
@@ -84,6 +99,8 @@ class RedisSettings(BaseModel):
     db: int
     max_connections: int
     BATCH_SIZE: int
+    COALESCE_WINDOW: float = 0.0005
+    COALESCE_MAX_BATCH: int = 256
 
 
 class CelerySettings(BaseModel):
@@ -95,6 +112,59 @@ class CelerySettings(BaseModel):
     TASKS_QUEUE: str
 
 
+class ChatSettings(BaseModel):
+    WRITE_MODE: WriteMode = WriteMode.BUFFERED
+    TAIL_SIZE: int = 200
+    TAIL_TTL: int = 86400
+    REPLAY_LIMIT: int = 200
+    JOIN_HISTORY_LIMIT: int = 100
+    IDEMPOTENCY_TTL: int = 300
+    CHANGELOG_SIZE: int = 1000
+    CHANGELOG_TTL: int = 7 * 86400
+    SYNC_LIMIT: int = 500
+    INBOX_TTL: int = 7 * 86400
+    INBOX_PAGE_SIZE: int = 50
+    INBOX_REBUILD_LIMIT: int = 500
+    PREVIEW_LENGTH: int = 200
+    READ_FLUSH_INTERVAL: int = 10
+    READ_FLUSH_BATCH: int = 1000
+    SEARCH_LIMIT: int = 50
+    SEARCH_CACHE_CONVERSATIONS: int = 20
+    SEARCH_CACHE_SCAN: int = 200
+    HISTORY_CACHE_ENABLED: bool = True
+    HISTORY_CACHE_SIZE: int = 200
+    HISTORY_CACHE_TTL: int = 3600
+
+
+class ArchiveSettings(BaseModel):
+    ENABLED: bool = False
+    AGE_DAYS: int = 180
+    PREFIX: str = "archive"
+    SEGMENT_SIZE: int = 5000
+    COMPRESSION_LEVEL: int = 10
+    CACHE_SEGMENTS: int = 64
+    INTERVAL: int = 3600
+
+
+class RateLimitRule(BaseModel):
+    rate: float
+    burst: int
+
+
+class RateLimitSettings(BaseModel):
+    BACKEND: RateLimitBackend = RateLimitBackend.LOCAL
+    SID_LIMITS: Dict[str, RateLimitRule] = {
+        "send_message": RateLimitRule(rate=5, burst=10),
+        "join_conversation": RateLimitRule(rate=1, burst=5),
+        "mark_read": RateLimitRule(rate=5, burst=10),
+    }
+    USER_LIMITS: Dict[str, RateLimitRule] = {
+        "send_message": RateLimitRule(rate=10, burst=20),
+        "join_conversation": RateLimitRule(rate=2, burst=10),
+    }
+    MAX_LOCAL_BUCKETS: int = 100_000
+
+
 class Config(BaseSettings):
     model_config = SettingsConfigDict(
         env_file=(".env"),
@@ -115,6 +185,9 @@ class Config(BaseSettings):
     kafka: KafkaSettings
     redis: RedisSettings
     celery: CelerySettings
+    chat: ChatSettings = ChatSettings()
+    rate_limit: RateLimitSettings = RateLimitSettings()
+    archive: ArchiveSettings = ArchiveSettings()
 
 
 settings = Config()  # type: ignore[call-arg]
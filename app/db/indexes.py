@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import logging
+import sys
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from sqlalchemy import Table, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.mongo import mongo_db
+from app.db.postgres import postgres_db
+from app.models import models  # noqa: F401  registers tables on Base.metadata
+from app.models.base_model import Base
+from app.models.mongo.indexes import MONGO_INDEXES, leading_fields
+
+logger = logging.getLogger(__name__)
+
+_reported_shapes: Set[Tuple[str, FrozenSet[str]]] = set()
+
+
+async def ensure_mongo_indexes(
+    db: AsyncIOMotorDatabase, check_only: bool = False
+) -> List[str]:
+    missing = []
+    existing_by_collection: dict = {}
+
+    for index in MONGO_INDEXES:
+        if index.collection not in existing_by_collection:
+            existing_by_collection[index.collection] = await db[
+                index.collection
+            ].index_information()
+        existing = existing_by_collection[index.collection]
+
+        info = existing.get(index.name)
+        if info is not None:
+            if bool(info.get("unique")) != index.unique:
+                logger.warning(
+                    "Index %s.%s differs from registry", index.collection, index.name
+                )
+            continue
+
+        missing.append(f"{index.collection}.{index.name}")
+        if check_only:
+            continue
+
+        options = {"name": index.name, "unique": index.unique}
+        if index.partial:
+            options["partialFilterExpression"] = index.partial
+        await db[index.collection].create_index(list(index.keys), **options)
+
+    registered = {index.name for index in MONGO_INDEXES}
+    for collection, existing in existing_by_collection.items():
+        for name in existing.keys() - registered - {"_id_"}:
+            # never dropped automatically, e.g. participants.userId from old deploys
+            logger.warning("Index %s.%s is not in the registry", collection, name)
+
+    return missing
+
+
+def _sync_postgres_indexes(conn, check_only: bool) -> List[str]:
+    inspector = inspect(conn)
+    missing = []
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+
+            missing.append(f"{table.name}.{index.name}")
+            if not check_only:
+                index.create(conn)
+
+    return missing
+
+
+async def ensure_postgres_indexes(
+    engine: AsyncEngine, check_only: bool = False
+) -> List[str]:
+    async with engine.begin() as conn:
+        return await conn.run_sync(_sync_postgres_indexes, check_only)
+
+
+async def ensure_indexes(check_only: bool = False) -> List[str]:
+    missing = await ensure_mongo_indexes(mongo_db._db, check_only)
+    missing += await ensure_postgres_indexes(postgres_db.engine, check_only)
+
+    for name in missing:
+        if check_only:
+            logger.warning("Missing index %s", name)
+        else:
+            logger.info("Created index %s", name)
+    return missing
+
+
+@lru_cache(maxsize=None)
+def table_leading_fields(table: Table) -> FrozenSet[str]:
+    fields = {column.name for column in table.primary_key.columns}
+    for index in table.indexes:
+        fields.add(index.columns[0].name)
+    for column in table.columns:
+        if column.unique:
+            fields.add(column.name)
+    return frozenset(fields)
+
+
+def warn_unindexed(source: str, fields: Iterable[str], indexed: Iterable[str]) -> None:
+    shape = frozenset(fields)
+    if not shape or not shape.isdisjoint(indexed):
+        return
+
+    if (source, shape) in _reported_shapes:
+        return
+    _reported_shapes.add((source, shape))
+
+    logger.warning(
+        "Query on %s filters on %s, no index leads with any of these fields",
+        source,
+        sorted(shape),
+    )
+
+
+def warn_unindexed_collection(collection: str, fields: Iterable[str]) -> None:
+    warn_unindexed(collection, fields, leading_fields(collection))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create or verify database indexes")
+    parser.add_argument(
+        "--check", action="store_true", help="only report missing indexes"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    missing = asyncio.run(ensure_indexes(check_only=args.check))
+
+    if args.check and missing:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Histogram of time spent waiting for a pooled connection (in seconds).",
+    ["db"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+POOL_CHECKOUT_FAILURES = Counter(
+    "db_pool_checkout_failures_total",
+    "Total count of failed connection checkouts by reason.",
+    ["db", "reason"],
+)
+
+POOL_CONNECTIONS_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Gauge of pooled connections currently checked out.",
+    ["db"],
+)
+
+POOL_CONNECTIONS_OPEN = Gauge(
+    "db_pool_connections_open",
+    "Gauge of open pooled connections.",
+    ["db"],
+)
+
+MONGO_COMMAND_SECONDS = Histogram(
+    "mongo_command_duration_seconds",
+    "Histogram of mongo command round trip time by command (in seconds).",
+    ["command"],
+)
+
+MONGO_COMMAND_FAILURES = Counter(
+    "mongo_command_failures_total",
+    "Total count of failed mongo commands by command.",
+    ["command"],
+)
+
+
+class MongoPoolListener(monitoring.ConnectionPoolListener):
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        POOL_CONNECTIONS_OPEN.labels(db="mongo").inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        POOL_CONNECTIONS_OPEN.labels(db="mongo").dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        POOL_CHECKOUT_SECONDS.labels(db="mongo").observe(event.duration)
+        POOL_CHECKOUT_FAILURES.labels(db="mongo", reason=event.reason).inc()
+
+    def connection_checked_out(self, event):
+        POOL_CHECKOUT_SECONDS.labels(db="mongo").observe(event.duration)
+        POOL_CONNECTIONS_IN_USE.labels(db="mongo").inc()
+
+    def connection_checked_in(self, event):
+        POOL_CONNECTIONS_IN_USE.labels(db="mongo").dec()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.labels(command=event.command_name).observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.labels(command=event.command_name).observe(
+            event.duration_micros / 1_000_000
+        )
+        MONGO_COMMAND_FAILURES.labels(command=event.command_name).inc()
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # sqlalchemy has no checkout-started event, time the wait around _do_get
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_FAILURES.labels(db="postgres", reason="timeout").inc()
+            raise
+        finally:
+            POOL_CHECKOUT_SECONDS.labels(db="postgres").observe(
+                time.perf_counter() - start
+            )
+        return connection
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    pool = engine.sync_engine.pool
+
+    POOL_CONNECTIONS_IN_USE.labels(db="postgres").set_function(pool.checkedout)
+    POOL_CONNECTIONS_OPEN.labels(db="postgres").set_function(
+        lambda: pool.checkedin() + pool.checkedout()
+    )
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _on_error(context):
+        if context.is_disconnect:
+            POOL_CHECKOUT_FAILURES.labels(db="postgres", reason="disconnect").inc()
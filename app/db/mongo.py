@@ -1,17 +1,23 @@
 from contextlib import asynccontextmanager
-from typing import Any, AsyncContextManager
+from typing import Any, AsyncContextManager, Optional
 
+import pymongo
 from motor.core import AgnosticClientSession
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pymongo.errors import PyMongoError
+from pymongo.read_concern import ReadConcern
 
 from app.config import settings
+from app.db.metrics import MongoCommandListener, MongoPoolListener
+from app.enum import ReadPreference
 
 
 class MongoSession:
     __slots__ = ("db", "session")
 
-    def __init__(self, db: AsyncIOMotorDatabase, session: AgnosticClientSession):
+    def __init__(
+        self, db: AsyncIOMotorDatabase, session: Optional[AgnosticClientSession]
+    ):
         self.db = db
         self.session = session
 
@@ -19,11 +25,29 @@ class MongoSession:
 class Database:
     def __init__(self) -> None:
         self.client = AsyncIOMotorClient(
-            f"mongodb://{settings.mongo.host}:{settings.mongo.port}?replicaSet=rs0"
+            f"mongodb://{settings.mongo.host}:{settings.mongo.port}?replicaSet=rs0",
+            maxPoolSize=settings.mongo.MAX_POOL_SIZE,
+            minPoolSize=settings.mongo.MIN_POOL_SIZE,
+            waitQueueTimeoutMS=settings.mongo.WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=[MongoPoolListener(), MongoCommandListener()],
         )
         self._db = self.client[settings.mongo.database]
+        self._read_db = self._with_read_options(settings.mongo.READ_PREFERENCE)
+        self._history_db = self._with_read_options(
+            settings.mongo.HISTORY_READ_PREFERENCE
+        )
+
+    def _with_read_options(self, preference: ReadPreference) -> AsyncIOMotorDatabase:
+        return self._db.with_options(
+            read_preference=getattr(pymongo.ReadPreference, preference.name),
+            read_concern=ReadConcern(settings.mongo.READ_CONCERN),
+        )
 
-    def __call__(self) -> AsyncContextManager[Any]:
+    def __call__(
+        self, read_only: bool = False, history: bool = False
+    ) -> AsyncContextManager[Any]:
+        if read_only:
+            return self.get_read_session(history)
         return self.get_db_session()
 
     @asynccontextmanager
@@ -37,5 +61,12 @@ class Database:
         finally:
             await session.end_session()
 
+    @asynccontextmanager
+    async def get_read_session(self, history: bool = False):
+        # single reads need no transaction, the driver uses an implicit session
+        yield MongoSession(
+            db=self._history_db if history else self._read_db, session=None
+        )
+
 
 mongo_db = Database()
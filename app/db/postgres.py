@@ -5,6 +5,7 @@ from sqlalchemy import URL
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.config import settings
+from app.db.metrics import InstrumentedQueuePool, instrument_engine
 
 
 class Database:
@@ -25,13 +26,19 @@ class Database:
             pool_timeout=settings.db_pool_conf.pool_timeout,
             pool_recycle=settings.db_pool_conf.pool_recycle,
             pool_pre_ping=settings.db_pool_conf.pool_pre_ping,
+            poolclass=InstrumentedQueuePool,
         )
+        instrument_engine(self.engine)
 
         self._session_factory = async_sessionmaker(
             self.engine, autocommit=False, autoflush=False, expire_on_commit=False
         )
 
-    def __call__(self) -> AsyncContextManager[Any]:
+    def __call__(
+        self, read_only: bool = False, history: bool = False
+    ) -> AsyncContextManager[Any]:
+        if read_only:
+            return self.get_read_session()
         return self.get_db_session()
 
     @asynccontextmanager
@@ -39,5 +46,10 @@ class Database:
         async with self._session_factory.begin() as session:
             yield session
 
+    @asynccontextmanager
+    async def get_read_session(self):
+        async with self._session_factory() as session:
+            yield session
+
 
 postgres_db = Database()
@@ -15,3 +15,26 @@ class AttachmentType(str, Enum):
 
 class IncludeParams(str, Enum):
     PARTICIPANTS = "participants"
+
+
+class WriteMode(str, Enum):
+    BUFFERED = "buffered"
+    DIRECT = "direct"
+
+
+class RateLimitBackend(str, Enum):
+    LOCAL = "local"
+    REDIS = "redis"
+
+
+class SlowConsumerPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DISCONNECT = "disconnect"
+
+
+class ReadPreference(str, Enum):
+    PRIMARY = "primary"
+    PRIMARY_PREFERRED = "primaryPreferred"
+    SECONDARY = "secondary"
+    SECONDARY_PREFERRED = "secondaryPreferred"
+    NEAREST = "nearest"
@@ -1,5 +1,5 @@
 import asyncio
-from typing import Any, Awaitable, Optional
+from typing import Any, Awaitable, Optional, Set
 
 from app.config import settings
 from app.kafka.channel import ProducerChannel
@@ -19,14 +19,17 @@ class ProducerBuffer(ProducerBufferT):
         self.pending: asyncio.Queue[FutureMessage] = asyncio.Queue(
             maxsize=self.max_messages
         )
+        self.not_empty = asyncio.Event()
 
     def put(self, fut: FutureMessage) -> None:
         if self.pending.full():
             fut.set_exception(asyncio.QueueFull("Producer buffer is full"))
             return
         self.pending.put_nowait(fut)
+        self.not_empty.set()
 
     async def flush(self) -> None:
+        self.not_empty.clear()
         tasks = []
 
         while True:
@@ -53,10 +56,13 @@ class ProducerBuffer(ProducerBufferT):
 
 
 class Producer(ProducerT):
-    def __init__(self, **kwargs) -> None:
+    def __init__(self, linger: float = settings.kafka.LINGER, **kwargs) -> None:
         self._channel = ProducerChannel(**kwargs)
         self._buffer = ProducerBuffer(self._channel)
         self._closed = True
+        self._linger = linger
+        self._flusher: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
 
     async def start(self) -> None:
         if not self._closed:
@@ -64,6 +70,17 @@ class Producer(ProducerT):
 
         await self._channel.start()
         self._closed = False
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        # senders only await their future, batches leave once per linger
+        while True:
+            await self._buffer.not_empty.wait()
+            await asyncio.sleep(self._linger)
+            # acks are awaited off the loop so the next batch is not held back
+            task = asyncio.create_task(self._buffer.flush())
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
 
     async def send(
         self,
@@ -104,6 +121,12 @@ class Producer(ProducerT):
         if self._closed:
             return
 
+        if self._flusher:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+        await self._buffer.flush()
+        await asyncio.gather(*self._in_flight, return_exceptions=True)
         self._closed = True
-        await self.flush()
         await self._channel.stop()
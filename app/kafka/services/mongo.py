@@ -1,6 +1,8 @@
+from app.cache import RedisManager
+from app.exceptions import RecordAlreadyExists
 from app.kafka.serializers import JSONCodec
 from app.kafka.transport import Transport
-from app.schemas.message import MessageCreate
+from app.schemas.message import MessageCreate, MessageCreateWithId
 from app.services.message import MessageService
 from app.types.message import Headers
 from app.types.transport import ServiceT
@@ -13,6 +15,7 @@ class KafkaToMongoDB(ServiceT):
         self.transport = Transport()
         self.mongo = MessageService()
         self.consumer = None
+        self.redis = None
         super().__init__()
 
     async def start(self) -> None:
@@ -22,6 +25,8 @@ class KafkaToMongoDB(ServiceT):
         self.consumer = self.transport.create_consumer()
         self.consumer.subscribe([self.topic])
         await self.consumer.start()
+        self.redis = RedisManager()
+        await self.redis.connect()
 
         self._closed = False
         self._ready.set()
@@ -37,8 +42,12 @@ class KafkaToMongoDB(ServiceT):
                 pass  # later: need to log
             await self.consumer.close()
 
+        if self.redis:
+            await self.redis.disconnect()
+
         self._ready.clear()
         self._closed = True
+        self.redis = None
 
     async def process(self) -> None:
         if self._closed or not self._ready.is_set():
@@ -49,12 +58,54 @@ class KafkaToMongoDB(ServiceT):
 
         messages = await self.consumer.consume_batch(max_records=100, timeout=10)
 
+        batch = []
         for message in messages:
             if message.value:
                 json_data = JSONCodec().loads(
                     message.value
                 )  # later: change (serialize up level or object)
-                message = MessageCreate(**json_data)
-                await self.mongo.create(message)
+                if json_data.get("seq") is None:
+                    # a stored null would still fall under the unique seq index
+                    json_data.pop("seq", None)
+                if "_id" in json_data:
+                    batch.append(MessageCreateWithId(**json_data))
+                else:
+                    batch.append(MessageCreate(**json_data))
+
+        if batch:
+            try:
+                persisted = await self.mongo.create_many(batch)
+            except RecordAlreadyExists:
+                # redelivered records abort the batch, persist the rest one by one
+                persisted = [await self._persist_one(message) for message in batch]
+
+            if self.redis:
+                await self.redis.append_history(
+                    sorted(
+                        (
+                            {
+                                **m.model_dump(by_alias=True, mode="json"),
+                                "source": "db",
+                            }
+                            for m in persisted
+                        ),
+                        key=lambda m: m["_id"],
+                    )
+                )
 
         await self.consumer.commit()
+
+    async def _persist_one(self, message: MessageCreate):
+        try:
+            return await self.mongo.create(message)
+        except RecordAlreadyExists:
+            if isinstance(message, MessageCreateWithId) and await self.mongo.exists(
+                id=message.id
+            ):
+                return message
+            if message.seq is None or not self.redis:
+                raise
+
+        # the id is new, so the seq was handed out twice by a reset counter
+        message.seq = await self.redis.next_seq(message.conversationId)
+        return await self.mongo.create(message)
@@ -6,9 +6,13 @@ from fastapi.security import HTTPBearer
 from prometheus_client import make_asgi_app
 from starlette.middleware.authentication import AuthenticationMiddleware
 
+from app.chat.changes import ChangeStreamListener
 from app.chat.chat import ChatServer
 from app.config import settings
+from app.db.indexes import ensure_indexes
 from app.dependencies import redis_manager
+from app.enum import WriteMode
+from app.kafka.transport import Transport
 from app.middleware.auth_middleware import JWTAuthMiddleware
 from app.middleware.context import ContextMiddleware
 from app.middleware.prometheus import PrometheusMiddleware
@@ -23,9 +27,25 @@ from app.routers.users import router as users_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await redis_manager.connect()
+
+    if settings.app.ENSURE_INDEXES:
+        await ensure_indexes()
+
+    if settings.chat.WRITE_MODE == WriteMode.DIRECT:
+        chat_app.producer = Transport().create_producer()
+        await chat_app.producer.start()
+
+    if settings.mongo.CHANGE_STREAM_ENABLED:
+        await change_listener.start()
+
     try:
         yield
     finally:
+        await change_listener.stop()
+        await chat_app.writer.flush()
+        if chat_app.producer:
+            await chat_app.producer.close()
+            chat_app.producer = None
         await redis_manager.disconnect()
 
 
@@ -55,6 +75,9 @@ app.include_router(conv_router)
 app.include_router(messages_router)
 
 chat_app = ChatServer(redis=redis_manager)
+change_listener = ChangeStreamListener(
+    redis_manager, chat_app, name=settings.mongo.CHANGE_STREAM_NAME
+)
 app.mount("/ws", chat_app)
 
 metrics_app = make_asgi_app()
@@ -20,7 +20,7 @@ class RoleToPermission(Base):
 
 
 class User(IntegerIDMixin, TimeStampMixin, Base):
-    username: Mapped[str]
+    username: Mapped[str] = mapped_column(index=True)
     email: Mapped[str] = mapped_column(unique=True)
     hashed_password: Mapped[str] = mapped_column(nullable=False)
 
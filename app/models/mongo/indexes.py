@@ -0,0 +1,46 @@
+from functools import lru_cache
+from typing import FrozenSet, List, NamedTuple, Optional, Tuple, Union
+
+IndexKey = Tuple[str, Union[int, str]]
+
+
+class MongoIndex(NamedTuple):
+    collection: str
+    keys: Tuple[IndexKey, ...]
+    unique: bool = False
+    partial: Optional[dict] = None
+
+    @property
+    def name(self) -> str:
+        # same naming as the server default, so indexes from mongo-init.js match
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+MONGO_INDEXES: List[MongoIndex] = [
+    MongoIndex("messages", (("conversationId", 1), ("createdAt", -1))),
+    MongoIndex("messages", (("conversationId", 1), ("_id", -1))),
+    MongoIndex("messages", (("authorId", 1), ("createdAt", -1))),
+    MongoIndex("messages", (("content.text", "text"),)),
+    MongoIndex(
+        "messages",
+        (("conversationId", 1), ("seq", 1)),
+        unique=True,
+        partial={"seq": {"$exists": True}},
+    ),
+    MongoIndex("conversations", (("participants", 1), ("_id", -1))),
+    MongoIndex("conversations", (("updatedAt", -1),)),
+    MongoIndex("read_positions", (("conversationId", 1), ("userId", 1)), unique=True),
+    MongoIndex("archive_segments", (("key", 1),), unique=True),
+    MongoIndex("archive_segments", (("conversationId", 1), ("lastId", -1))),
+]
+
+
+def collection_indexes(collection: str) -> List[MongoIndex]:
+    return [index for index in MONGO_INDEXES if index.collection == collection]
+
+
+@lru_cache(maxsize=None)
+def leading_fields(collection: str) -> FrozenSet[str]:
+    return frozenset(
+        {"_id"} | {index.keys[0][0] for index in collection_indexes(collection)}
+    )
@@ -1,4 +1,5 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
 from bson import ObjectId
 from pydantic import BaseModel, ConfigDict, Field
@@ -13,6 +14,7 @@ class MessageModel(BaseModel, TimeStampMixin):
     authorId: int
     conversationId: str
     content: MessageContent
+    seq: Optional[int] = None
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -33,3 +35,35 @@ class ConversationModel(BaseModel, TimeStampMixin):
         from_attributes=True,
         json_encoders={ObjectId: str},
     )
+
+
+class ReadPositionModel(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    conversationId: str
+    userId: int
+    messageId: PyObjectId
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        from_attributes=True,
+        json_encoders={ObjectId: str},
+    )
+
+
+class ArchiveSegmentModel(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    conversationId: str
+    key: str
+    firstId: PyObjectId
+    lastId: PyObjectId
+    count: int
+    size: int
+    archivedAt: datetime = Field(default_factory=datetime.now)
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        from_attributes=True,
+        json_encoders={ObjectId: str},
+    )
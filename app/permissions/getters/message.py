@@ -5,7 +5,7 @@ from app.services._service import BaseService
 async def get_db_message(kwargs):
     service: BaseService = kwargs.get("service")
     message_id: str = kwargs.get("message_id")
-    return await service.find_one(id=message_id)
+    return await service.find_one(id=message_id, fields=["authorId"])
 
 
 async def get_cache_message(kwargs):
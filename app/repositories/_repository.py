@@ -17,3 +17,9 @@ class AbstractRepository(Protocol[ModelType, CreateSchemaType, UpdateSchemaType]
     async def update(self, data: UpdateSchemaType, *args, **kwargs) -> ModelType: ...
     async def delete(self, *args, **kwargs) -> None: ...
     async def exists(self, *args, **kwargs) -> bool: ...
+    async def create_many(
+        self, data: Sequence[CreateSchemaType], *args, **kwargs
+    ) -> Sequence[ModelType]: ...
+    async def find_by_ids(self, *args, **kwargs) -> Sequence[ModelType]: ...
+    async def update_many(self, *args, **kwargs) -> None: ...
+    async def delete_many(self, *args, **kwargs) -> None: ...
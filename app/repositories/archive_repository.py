@@ -0,0 +1,42 @@
+from typing import List, Optional
+
+from app.db.mongo import MongoSession
+from app.models.mongo.models import ArchiveSegmentModel
+from app.repositories.mongo_repository import MongoDBRepository
+from app.schemas.archive import ArchiveSegmentCreate, ArchiveSegmentUpdate
+
+
+class ArchiveSegmentRepository(
+    MongoDBRepository[ArchiveSegmentModel, ArchiveSegmentCreate, ArchiveSegmentUpdate]
+):
+    async def find_segments(
+        self,
+        session: MongoSession,
+        conversation_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        segment_after: Optional[str] = None,
+    ) -> List[dict]:
+        collection = self.get_collection(session.db)
+
+        # manifests store ids as lowercase hex, which orders like the ObjectIds.
+        # segment_after is the lastId of the previous batch, in sort order
+        filters: dict = {"conversationId": conversation_id}
+        if after is not None:
+            # oldest segments still holding messages newer than the cursor
+            filters["lastId"] = {"$gt": max(str(after).lower(), segment_after or "")}
+            sort = 1
+        else:
+            if before is not None:
+                filters["firstId"] = {"$lt": str(before).lower()}
+            if segment_after is not None:
+                filters["lastId"] = {"$lt": segment_after}
+            sort = -1
+
+        cursor = (
+            collection.find(filters, session=session.session)
+            .sort("lastId", sort)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
@@ -1,8 +1,129 @@
+from typing import List, Optional, Sequence
+
+from bson import ObjectId
+
+from app.db.mongo import MongoSession
 from app.models.mongo.models import MessageModel
 from app.repositories.mongo_repository import MongoDBRepository
 from app.schemas.message import MessageCreate, MessageUpdate
 
 
-class MessageRepository(
-    MongoDBRepository[MessageModel, MessageCreate, MessageUpdate]
-): ...
+class MessageRepository(MongoDBRepository[MessageModel, MessageCreate, MessageUpdate]):
+    async def find_after(
+        self,
+        session: MongoSession,
+        conversation_id: str,
+        limit: int,
+        after_id: Optional[str] = None,
+        after_seq: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[dict]:
+        collection = self.get_collection(session.db)
+
+        filters: dict = {"conversationId": conversation_id}
+        if after_seq is not None:
+            sort_field = "seq"
+            filters["seq"] = {"$gt": after_seq}
+        else:
+            sort_field = "_id"
+            filters["_id"] = {"$gt": ObjectId(after_id)}
+
+        cursor = (
+            collection.find(filters, self._projection(fields), session=session.session)
+            .sort(sort_field, 1)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def max_seq(self, session: MongoSession, conversation_id: str) -> int:
+        collection = self.get_collection(session.db)
+
+        document = await collection.find_one(
+            {"conversationId": conversation_id, "seq": {"$exists": True}},
+            {"seq": 1},
+            sort=[("seq", -1)],
+            session=session.session,
+        )
+        return document["seq"] if document else 0
+
+    async def last_messages(
+        self, session: MongoSession, conversation_ids: List[str]
+    ) -> List[dict]:
+        collection = self.get_collection(session.db)
+
+        # walks the (conversationId, _id) index backwards, one document per group
+        pipeline = [
+            {"$match": {"conversationId": {"$in": conversation_ids}}},
+            {"$sort": {"conversationId": 1, "_id": -1}},
+            {"$group": {"_id": "$conversationId", "message": {"$first": "$$ROOT"}}},
+        ]
+        cursor = collection.aggregate(pipeline, session=session.session)
+        return [group["message"] async for group in cursor]
+
+    async def search(
+        self,
+        session: MongoSession,
+        query: str,
+        conversation_ids: List[str],
+        limit: int,
+        after_score: Optional[float] = None,
+        after_id: Optional[str] = None,
+        exclude_ids: Sequence[str] = (),
+    ) -> List[dict]:
+        collection = self.get_collection(session.db)
+
+        match: dict = {
+            "$text": {"$search": query},
+            "conversationId": {"$in": conversation_ids},
+        }
+        if exclude_ids:
+            match["_id"] = {"$nin": [ObjectId(_id) for _id in exclude_ids]}
+
+        pipeline: List[dict] = [
+            {"$match": match},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        if after_score is not None and after_id is not None:
+            # keyset on (score desc, _id desc)
+            pipeline.append(
+                {
+                    "$match": {
+                        "$or": [
+                            {"score": {"$lt": after_score}},
+                            {"score": after_score, "_id": {"$lt": ObjectId(after_id)}},
+                        ]
+                    }
+                }
+            )
+        pipeline += [
+            {"$sort": {"score": -1, "_id": -1}},
+            {"$limit": limit},
+            {
+                "$project": {
+                    "conversationId": 1,
+                    "authorId": 1,
+                    "content.type": 1,
+                    "content.text": 1,
+                    "seq": 1,
+                    "score": 1,
+                }
+            },
+        ]
+        cursor = collection.aggregate(pipeline, session=session.session)
+        return await cursor.to_list(length=limit)
+
+    async def conversations_before(
+        self, session: MongoSession, cutoff: ObjectId
+    ) -> List[str]:
+        collection = self.get_collection(session.db)
+
+        return await collection.distinct(
+            "conversationId", {"_id": {"$lt": cutoff}}, session=session.session
+        )
+
+    async def mark_archived(self, session: MongoSession, ids: List[str]) -> None:
+        collection = self.get_collection(session.db)
+
+        await collection.update_many(
+            self._ids_filter(ids), {"$set": {"archived": True}}, session=session.session
+        )
@@ -1,8 +1,10 @@
-from typing import Type
+from typing import List, Optional, Sequence, Tuple, Type
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import UpdateOne
 
+from app.db.indexes import warn_unindexed_collection
 from app.db.mongo import MongoSession
 from app.repositories._repository import (
     AbstractRepository,
@@ -31,28 +33,106 @@ class MongoDBRepository(
                     filters["_id" if field == "id" else field] = ObjectId(_id)
         return filters
 
+    def _projection(self, fields: Optional[Sequence[str]]) -> Optional[dict]:
+        if not fields:
+            return None
+        return {"_id" if field == "id" else field: 1 for field in fields}
+
     async def create(
         self,
         session: MongoSession,
         data: CreateSchemaType,
+        read_back: bool = False,
     ) -> ModelType:
         collection = self.get_collection(session.db)
 
-        doc = data.model_dump(exclude_unset=True)
+        doc = self._transform_objectid_fields(data.model_dump(exclude_unset=True))
 
         result = await collection.insert_one(doc, session=session.session)
 
-        created_doc = await collection.find_one(
-            {"_id": result.inserted_id}, session=session.session
+        if read_back:
+            return await collection.find_one(
+                {"_id": result.inserted_id}, session=session.session
+            )
+
+        # the inserted payload plus its id is the stored document
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def create_many(
+        self,
+        session: MongoSession,
+        data: Sequence[CreateSchemaType],
+        read_back: bool = False,
+        ordered: bool = True,
+    ) -> List[ModelType]:
+        if not data:
+            return []
+
+        collection = self.get_collection(session.db)
+
+        docs = [
+            self._transform_objectid_fields(item.model_dump(exclude_unset=True))
+            for item in data
+        ]
+
+        result = await collection.insert_many(
+            docs, ordered=ordered, session=session.session
         )
-        return created_doc
 
-    async def find_one(self, session: MongoSession, **filters):
+        if read_back:
+            cursor = collection.find(
+                {"_id": {"$in": result.inserted_ids}}, session=session.session
+            )
+            return await cursor.to_list(length=len(docs))
+
+        for doc, inserted_id in zip(docs, result.inserted_ids):
+            doc["_id"] = inserted_id
+        return docs
+
+    async def find_one(
+        self,
+        session: MongoSession,
+        fields: Optional[Sequence[str]] = None,
+        **filters,
+    ):
         collection = self.get_collection(session.db)
 
         filters = self._transform_objectid_fields(filters)
+        warn_unindexed_collection(self.collection_name, filters)
 
-        return await collection.find_one(filters, session=session.session)
+        return await collection.find_one(
+            filters, self._projection(fields), session=session.session
+        )
+
+    def _ids_filter(self, ids: Sequence[str | ObjectId]) -> dict:
+        return {"_id": {"$in": [ObjectId(_id) for _id in ids]}}
+
+    async def find_by_ids(
+        self,
+        session: MongoSession,
+        ids: Sequence[str | ObjectId],
+        fields: Optional[Sequence[str]] = None,
+    ) -> List[ModelType]:
+        if not ids:
+            return []
+
+        collection = self.get_collection(session.db)
+
+        cursor = collection.find(
+            self._ids_filter(ids), self._projection(fields), session=session.session
+        )
+        return await cursor.to_list(length=len(ids))
+
+    def _keyset_filter(
+        self, before: Optional[str | ObjectId], after: Optional[str | ObjectId]
+    ) -> dict:
+        bounds = {}
+        if before is not None:
+            bounds["$lt"] = ObjectId(before)
+        if after is not None:
+            bounds["$gt"] = ObjectId(after)
+        return {"_id": bounds} if bounds else {}
 
     async def find_all(
         self,
@@ -60,19 +140,29 @@ class MongoDBRepository(
         order: str = "id",
         limit: int = 100,
         offset: int = 0,
+        before: Optional[str | ObjectId] = None,
+        after: Optional[str | ObjectId] = None,
+        fields: Optional[Sequence[str]] = None,
         **filters,
     ):
         collection = self.get_collection(session.db)
 
         filters = self._transform_objectid_fields(filters)
+        warn_unindexed_collection(self.collection_name, filters)
+        filters.update(self._keyset_filter(before, after))
 
-        cursor = collection.find(filters, session=session.session)
+        cursor = collection.find(
+            filters, self._projection(fields), session=session.session
+        )
 
         if order:
-            sort_field = "_id" if order == "id" else order
-            cursor = cursor.sort(sort_field, 1)
+            field = order.lstrip("-")
+            sort_field = "_id" if field == "id" else field
+            cursor = cursor.sort(sort_field, -1 if order.startswith("-") else 1)
 
-        cursor = cursor.skip(offset).limit(limit)
+        if offset:
+            cursor = cursor.skip(offset)
+        cursor = cursor.limit(limit)
 
         return await cursor.to_list(length=limit)
 
@@ -117,8 +207,39 @@ class MongoDBRepository(
         collection = self.get_collection(session.db)
 
         filters = self._transform_objectid_fields(filters)
+        warn_unindexed_collection(self.collection_name, filters)
 
         count = await collection.count_documents(
             filters, limit=1, session=session.session
         )
         return count > 0
+
+    async def update_many(
+        self,
+        session: MongoSession,
+        updates: Sequence[Tuple[str | ObjectId, UpdateSchemaType]],
+    ) -> None:
+        if not updates:
+            return
+
+        collection = self.get_collection(session.db)
+
+        operations = [
+            UpdateOne(
+                {"_id": ObjectId(_id)}, {"$set": data.model_dump(exclude_unset=True)}
+            )
+            for _id, data in updates
+        ]
+        await collection.bulk_write(operations, ordered=False, session=session.session)
+
+    async def delete_many(
+        self,
+        session: MongoSession,
+        ids: Sequence[str | ObjectId],
+    ) -> None:
+        if not ids:
+            return
+
+        collection = self.get_collection(session.db)
+
+        await collection.delete_many(self._ids_filter(ids), session=session.session)
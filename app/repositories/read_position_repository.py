@@ -0,0 +1,31 @@
+from typing import List, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.db.mongo import MongoSession
+from app.models.mongo.models import ReadPositionModel
+from app.repositories.mongo_repository import MongoDBRepository
+from app.schemas.read_position import ReadPositionCreate, ReadPositionUpdate
+
+
+class ReadPositionRepository(
+    MongoDBRepository[ReadPositionModel, ReadPositionCreate, ReadPositionUpdate]
+):
+    async def upsert_many(
+        self, session: MongoSession, positions: List[Tuple[str, int, str]]
+    ) -> None:
+        if not positions:
+            return
+
+        collection = self.get_collection(session.db)
+
+        operations = [
+            UpdateOne(
+                {"conversationId": conv_id, "userId": user_id},
+                {"$max": {"messageId": ObjectId(message_id)}},
+                upsert=True,
+            )
+            for conv_id, user_id, message_id in positions
+        ]
+        await collection.bulk_write(operations, ordered=False, session=session.session)
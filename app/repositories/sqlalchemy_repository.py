@@ -1,8 +1,10 @@
-from typing import Sequence, Type
+from typing import Any, Optional, Sequence, Tuple, Type
 
-from sqlalchemy import delete, exists, select, update
+from sqlalchemy import delete, desc, exists, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.db.indexes import table_leading_fields, warn_unindexed
 from app.repositories._repository import (
     AbstractRepository,
     CreateSchemaType,
@@ -17,6 +19,16 @@ class SqlAlchemyRepository(
     def __init__(self, model: Type[ModelType]) -> None:
         self.model = model
 
+    def _check_indexed(self, filters: dict) -> None:
+        table = self.model.__table__
+        warn_unindexed(table.name, filters, table_leading_fields(table))
+
+    def _select(self, fields: Optional[Sequence[str]] = None):
+        stmt = select(self.model)
+        if fields:
+            stmt = stmt.options(load_only(*(getattr(self.model, f) for f in fields)))
+        return stmt
+
     async def create(self, session: AsyncSession, data: CreateSchemaType) -> ModelType:
         instance = self.model(**data.model_dump())
         session.add(instance)
@@ -24,6 +36,19 @@ class SqlAlchemyRepository(
         await session.refresh(instance)
         return instance
 
+    async def create_many(
+        self, session: AsyncSession, data: Sequence[CreateSchemaType]
+    ) -> Sequence[ModelType]:
+        if not data:
+            return []
+
+        # executemany with RETURNING, one round trip for the whole batch
+        result = await session.scalars(
+            insert(self.model).returning(self.model),
+            [item.model_dump() for item in data],
+        )
+        return result.all()
+
     async def update(
         self, session: AsyncSession, data: UpdateSchemaType, **filters
     ) -> ModelType:
@@ -37,31 +62,78 @@ class SqlAlchemyRepository(
         res = await session.execute(stmt)
         return res.scalar_one()
 
+    async def update_many(
+        self, session: AsyncSession, updates: Sequence[Tuple[Any, UpdateSchemaType]]
+    ) -> None:
+        if not updates:
+            return
+
+        # bulk UPDATE by primary key, executed as executemany
+        await session.execute(
+            update(self.model),
+            [{"id": pk, **data.model_dump(exclude_unset=True)} for pk, data in updates],
+        )
+
     async def delete(self, session: AsyncSession, **filters) -> None:
         await session.execute(delete(self.model).filter_by(**filters))
 
+    async def delete_many(self, session: AsyncSession, ids: Sequence[Any]) -> None:
+        if not ids:
+            return
+
+        await session.execute(delete(self.model).where(self.model.id.in_(ids)))
+
     async def exists(self, session: AsyncSession, **filters) -> bool:
+        self._check_indexed(filters)
         stmt = select(
             exists().where(*[getattr(self.model, k) == v for k, v in filters.items()])
         )
         result = await session.execute(stmt)
         return bool(result.scalar())
 
-    async def find_one(self, session: AsyncSession, **filters) -> ModelType | None:
-        row = await session.execute(select(self.model).filter_by(**filters))
+    async def find_one(
+        self,
+        session: AsyncSession,
+        fields: Optional[Sequence[str]] = None,
+        **filters,
+    ) -> ModelType | None:
+        self._check_indexed(filters)
+        row = await session.execute(self._select(fields).filter_by(**filters))
         return row.scalar_one_or_none()
 
+    async def find_by_ids(
+        self,
+        session: AsyncSession,
+        ids: Sequence[Any],
+        fields: Optional[Sequence[str]] = None,
+    ) -> Sequence[ModelType]:
+        if not ids:
+            return []
+
+        row = await session.execute(self._select(fields).where(self.model.id.in_(ids)))
+        return row.scalars().all()
+
     async def find_all(
         self,
         session: AsyncSession,
         order: str = "id",
         limit: int = 100,
         offset: int = 0,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+        fields: Optional[Sequence[str]] = None,
         **filters,
     ) -> Sequence[ModelType]:
-        stmt = select(self.model).order_by(order).limit(limit).offset(offset)
+        order_by = desc(order[1:]) if order.startswith("-") else order
+        stmt = self._select(fields).order_by(order_by).limit(limit).offset(offset)
+
+        if before is not None:
+            stmt = stmt.where(self.model.id < before)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
 
         if filters:
+            self._check_indexed(filters)
             stmt = stmt.filter_by(**filters)
 
         row = await session.execute(stmt)
@@ -1,7 +1,16 @@
 from typing import Annotated, List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+)
 
+from app.config import settings
 from app.dependencies import AWSManagerDep, RedisManagerDep
 from app.enum import IncludeParams
 from app.exceptions import AWSDownloadError, AWSUploadError
@@ -12,18 +21,25 @@ from app.schemas.conversation import (
     ConversationCreate,
     ConversationResponse,
     ConversationWithUsersResponse,
+    Inbox,
+    ReadReceipts,
 )
 from app.schemas.message import (
     AttachmentDownload,
     AttachmentUpload,
     CacheMessage,
     DBMessage,
+    MessageChanges,
+    MessageListAdapter,
 )
 from app.services.conversation import ConversationService
-from app.utils import load_messages
+from app.services.read_position import ReadPositionService
+from app.utils import load_changes, load_inbox, load_messages, load_read_receipts
 
 router = APIRouter(prefix="/conversations", tags=["Conversations"])
 
+OBJECT_ID_PATTERN = r"^[0-9a-fA-F]{24}$"
+
 
 def get_conv_service() -> ConversationService:
     return ConversationService()
@@ -32,6 +48,16 @@ def get_conv_service() -> ConversationService:
 ConvServiceDep = Annotated[ConversationService, Depends(get_conv_service)]
 
 
+async def check_participant(
+    request: Request, service: ConversationService, conv_id: str
+) -> None:
+    conversation = await service.find_one(id=conv_id, fields=["participants"])
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if request.user.id not in conversation["participants"]:
+        raise HTTPException(status_code=403, detail="Permission denied")
+
+
 @router.get("/", response_model=List[ConversationResponse])
 @requires_check()
 async def get_user_conversations(request: Request, service: ConvServiceDep):
@@ -39,6 +65,24 @@ async def get_user_conversations(request: Request, service: ConvServiceDep):
     return conversations
 
 
+@router.get("/inbox", response_model=Inbox)
+@requires_check()
+async def get_user_inbox(
+    request: Request,
+    service: ConvServiceDep,
+    message_service: MessageServiceDep,
+    redis: RedisManagerDep,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(
+        settings.chat.INBOX_PAGE_SIZE, ge=1, le=settings.chat.INBOX_REBUILD_LIMIT
+    ),
+):
+    inbox = await load_inbox(
+        service, message_service, redis, request.user.id, offset=offset, limit=limit
+    )
+    return inbox
+
+
 @router.get("/{conv_id}", response_model=ConversationWithUsersResponse)
 async def get_conversation(
     conv_id: str,
@@ -62,12 +106,17 @@ async def get_conversation(
 @router.post("/", response_model=ConversationResponse)
 @requires_check()
 async def create_conversation(
-    request: Request, data: ConversationCreate, service: ConvServiceDep
+    request: Request,
+    data: ConversationCreate,
+    service: ConvServiceDep,
+    redis: RedisManagerDep,
 ):
     if request.user.id not in data.participants:
         data.participants.append(request.user.id)
 
     new_conv = await service.create(data)
+    await redis.set_participants(str(new_conv.id), data.participants)
+    await redis.invalidate_inboxes(data.participants)
     return new_conv
 
 
@@ -76,9 +125,57 @@ async def get_conversation_messages(
     conv_id: str,
     service: MessageServiceDep,
     redis: RedisManagerDep,
+    limit: int = Query(settings.redis.BATCH_SIZE, ge=1, le=settings.redis.BATCH_SIZE),
+    before: Optional[str] = Query(
+        None, pattern=OBJECT_ID_PATTERN, description="Page of messages older than id"
+    ),
+    after: Optional[str] = Query(
+        None, pattern=OBJECT_ID_PATTERN, description="Page of messages newer than id"
+    ),
+):
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either before or after")
+
+    messages = await load_messages(
+        service, redis, conv_id, limit=limit, before=before, after=after
+    )
+    # already in response shape, serialize once instead of re-validating
+    return Response(
+        content=MessageListAdapter.dump_json(messages, by_alias=True),
+        media_type="application/json",
+    )
+
+
+@router.get("/{conv_id}/changes", response_model=MessageChanges)
+@requires_check()
+async def get_conversation_changes(
+    request: Request,
+    service: MessageServiceDep,
+    conv_service: ConvServiceDep,
+    redis: RedisManagerDep,
+    conv_id: str = Path(..., pattern=OBJECT_ID_PATTERN),
+    since: Optional[str] = Query(
+        None, pattern=r"^\d+-\d+$", description="Checkpoint from a previous sync"
+    ),
+):
+    await check_participant(request, conv_service, conv_id)
+
+    changes = await load_changes(service, redis, conv_id, since)
+    return changes
+
+
+@router.get("/{conv_id}/reads", response_model=ReadReceipts)
+@requires_check()
+async def get_conversation_reads(
+    request: Request,
+    conv_service: ConvServiceDep,
+    redis: RedisManagerDep,
+    conv_id: str = Path(..., pattern=OBJECT_ID_PATTERN),
 ):
-    messages = await load_messages(service, redis, conv_id)
-    return messages
+    await check_participant(request, conv_service, conv_id)
+
+    receipts = await load_read_receipts(ReadPositionService(), redis, conv_id)
+    return receipts
 
 
 @router.post("/{conv_id}/upload-urls")
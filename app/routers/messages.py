@@ -1,12 +1,16 @@
-from typing import Annotated
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Body, Depends, Query, Response
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 
+from app.config import settings
 from app.dependencies import RedisManagerDep
 from app.permissions.decorators import check_own_or_permission, requires_check
 from app.permissions.getters import get_cache_message, get_db_message
-from app.schemas.message import MessageUpdate
+from app.schemas.message import MessageUpdate, SearchResults
+from app.services.conversation import ConversationService
 from app.services.message import MessageService
+from app.utils import search_messages
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
 
@@ -18,14 +22,58 @@ def get_message_service() -> MessageService:
 MessageServiceDep = Annotated[MessageService, Depends(get_message_service)]
 
 
+@router.get("/search", response_model=SearchResults)
+@requires_check()
+async def search_user_messages(
+    request: Request,
+    service: MessageServiceDep,
+    redis: RedisManagerDep,
+    q: str = Query(..., min_length=1, max_length=256),
+    conversation_id: Optional[str] = Query(None, pattern=r"^[0-9a-fA-F]{24}$"),
+    limit: int = Query(settings.chat.SEARCH_LIMIT, ge=1, le=settings.chat.SEARCH_LIMIT),
+    cursor: Optional[str] = Query(
+        None,
+        pattern=r"^([0-9.eE+-]+:[0-9a-fA-F]{24})?(~[0-9a-fA-F]{24}(,[0-9a-fA-F]{24})*)?$",
+        description="From a previous page",
+    ),
+):
+    conv_service = ConversationService()
+    if conversation_id:
+        conversation = await conv_service.find_one(
+            id=conversation_id, fields=["participants"]
+        )
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+        if request.user.id not in conversation["participants"]:
+            raise HTTPException(status_code=403, detail="Permission denied")
+
+    results = await search_messages(
+        conv_service,
+        service,
+        redis,
+        request.user.id,
+        q,
+        conversation_id=conversation_id,
+        limit=limit,
+        cursor=cursor,
+    )
+    return results
+
+
 @router.delete("/{message_id}", status_code=204)
 @requires_check(
     check_own_or_permission(
         "message", "delete", get_object=get_db_message, owner_field="authorId"
     )
 )
-async def delete_db_message(service: MessageServiceDep, message_id: str):
+async def delete_db_message(
+    service: MessageServiceDep, redis: RedisManagerDep, message_id: str
+):
+    message = await service.find_one(id=message_id)
     await service.delete(pk=message_id)
+
+    if message:
+        await redis.log_change(str(message.conversationId), "delete", message_id)
     return Response(status_code=204)
 
 
@@ -51,9 +99,19 @@ async def delete_cache_message(
     )
 )
 async def update_db_message(
-    service: MessageServiceDep, message_id: str, data: MessageUpdate
+    service: MessageServiceDep,
+    redis: RedisManagerDep,
+    message_id: str,
+    data: MessageUpdate,
 ):
     message = await service.update(pk=message_id, data=data)
+
+    await redis.log_change(
+        str(message.conversationId),
+        "update",
+        message_id,
+        jsonable_encoder({**message.model_dump(by_alias=True), "source": "db"}),
+    )
     return message
 
 
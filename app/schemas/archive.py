@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.mongo.base import PyObjectId
+
+
+class ArchiveSegmentCreate(BaseModel):
+    conversationId: str
+    key: str
+    firstId: PyObjectId
+    lastId: PyObjectId
+    count: int
+    size: int
+    # required, creates dump with exclude_unset and would drop a default
+    archivedAt: datetime
+
+
+class ArchiveSegmentUpdate(BaseModel):
+    count: Optional[int] = None
+    size: Optional[int] = None
+
+
+class ArchiveSegmentResponse(ArchiveSegmentCreate):
+    id: PyObjectId = Field(alias="_id")
+    archivedAt: Optional[datetime] = None
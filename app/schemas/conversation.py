@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -25,3 +25,29 @@ class ConversationResponse(BaseModel):
 class ConversationWithUsersResponse(BaseModel):
     conversation: ConversationResponse
     users: List[UserResponse] = Field(default_factory=list)
+
+
+class MessagePreview(BaseModel):
+    id: str
+    authorId: int
+    type: Optional[str] = None
+    text: Optional[str] = None
+    attachments: int = 0
+    seq: Optional[int] = None
+
+
+class InboxEntry(BaseModel):
+    conversation: ConversationResponse
+    last_message: Optional[MessagePreview] = None
+    last_activity: int
+    unread: int = 0
+
+
+class Inbox(BaseModel):
+    conversations: List[InboxEntry] = Field(default_factory=list)
+    has_more: bool = False
+
+
+class ReadReceipts(BaseModel):
+    conversation_id: str
+    positions: Dict[int, str] = Field(default_factory=dict)
@@ -1,6 +1,6 @@
-from typing import List, Literal, Optional, Union
+from typing import Annotated, List, Literal, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 
 from app.enum import AttachmentType
 from app.models.mongo.base import PyObjectId
@@ -34,6 +34,13 @@ class MessageCreate(BaseModel):
     conversationId: str
     content: MessageContent
     source: str
+    seq: Optional[int] = None
+
+
+class MessageCreateWithId(MessageCreate):
+    id: PyObjectId = Field(alias="_id")
+
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class MessageUpdate(BaseModel):
@@ -45,6 +52,7 @@ class MessageResponse(BaseModel):
     authorId: int
     conversationId: PyObjectId
     content: MessageContent
+    seq: Optional[int] = None
 
 
 class CacheMessage(MessageResponse):
@@ -54,5 +62,53 @@ class CacheMessage(MessageResponse):
 class DBMessage(MessageResponse):
     source: Literal["db"] = "db"
 
+    @classmethod
+    def from_document(cls, doc: dict) -> "DBMessage":
+        # documents were validated on the way in, build the response shape directly
+        content = doc.get("content") or {}
+        return cls.model_construct(
+            id=str(doc["_id"]),
+            authorId=doc["authorId"],
+            conversationId=str(doc["conversationId"]),
+            content=MessageContent.model_construct(
+                type=content.get("type"),
+                text=content.get("text"),
+                attachments=[
+                    Attachment.model_construct(
+                        **{**a, "type": AttachmentType(a["type"])}
+                    )
+                    for a in content.get("attachments") or []
+                ],
+            ),
+            seq=doc.get("seq"),
+        )
+
 
 MessageType = Union[CacheMessage, DBMessage]
+
+MessageListAdapter = TypeAdapter(
+    List[Annotated[MessageType, Field(discriminator="source")]]
+)
+
+
+class MessageChanges(BaseModel):
+    checkpoint: str
+    messages: List[MessageType] = Field(default_factory=list)
+    deleted: List[str] = Field(default_factory=list)
+    has_more: bool = False
+    reset: bool = False
+
+
+class SearchHit(BaseModel):
+    id: str
+    conversationId: str
+    authorId: int
+    text: Optional[str] = None
+    seq: Optional[int] = None
+    score: Optional[float] = None
+    source: Literal["cache", "db"]
+
+
+class SearchResults(BaseModel):
+    messages: List[SearchHit] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+from app.models.mongo.base import PyObjectId
+
+
+class ReadPositionUpdate(BaseModel):
+    messageId: PyObjectId
+
+
+class ReadPositionCreate(ReadPositionUpdate):
+    conversationId: str
+    userId: int
+
+
+class ReadPositionResponse(ReadPositionCreate):
+    id: PyObjectId = Field(alias="_id")
@@ -4,12 +4,16 @@ from typing import (
     Callable,
     Generic,
     List,
+    Optional,
+    Sequence,
+    Tuple,
     Type,
     TypeVar,
     Union,
 )
 
 from pydantic import BaseModel
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from sqlalchemy.exc import IntegrityError
 
 from app.exceptions import RecordAlreadyExists
@@ -26,23 +30,45 @@ ResponseSchemaType = TypeVar("ResponseSchemaType", bound=BaseModel)
 class BaseService(
     Generic[ModelType, CreateSchemaType, UpdateSchemaType, ResponseSchemaType]
 ):
+    history_reads: bool = False
+
     def __init__(
         self,
         repository: AbstractRepository[ModelType, CreateSchemaType, UpdateSchemaType],
         response_schema: Type[ResponseSchemaType],
-        db_session_factory: Callable[[], AsyncContextManager[Any]],
+        db_session_factory: Callable[..., AsyncContextManager[Any]],
     ) -> None:
         self.repository = repository
         self.response_schema = response_schema
         self.db_session_factory = db_session_factory
 
+    def _project(self, record: Any, fields: Sequence[str]) -> dict:
+        # partial records skip response validation, callers get plain dicts
+        if isinstance(record, dict):
+            return {f: record.get("_id" if f == "id" else f) for f in fields}
+        return {f: getattr(record, f) for f in fields}
+
     async def create(self, data: CreateSchemaType) -> ResponseSchemaType:
         try:
             async with self.db_session_factory() as session:
                 record = await self.repository.create(session, data)
                 return self.response_schema.model_validate(record)
-        except IntegrityError:
+        except (IntegrityError, DuplicateKeyError):
+            raise RecordAlreadyExists(detail="Record already exists")
+
+    async def create_many(
+        self, data: Sequence[CreateSchemaType]
+    ) -> List[ResponseSchemaType]:
+        try:
+            async with self.db_session_factory() as session:
+                records = await self.repository.create_many(session, data)
+                return [self.response_schema.model_validate(r) for r in records]
+        except (IntegrityError, DuplicateKeyError):
             raise RecordAlreadyExists(detail="Record already exists")
+        except BulkWriteError as e:
+            if all(err.get("code") == 11000 for err in e.details["writeErrors"]):
+                raise RecordAlreadyExists(detail="Record already exists")
+            raise
 
     async def update(
         self, pk: Union[int, str], data: UpdateSchemaType
@@ -55,24 +81,65 @@ class BaseService(
         async with self.db_session_factory() as session:
             return await self.repository.delete(session, id=pk)
 
-    async def exists(self, **filters) -> bool:
+    async def update_many(
+        self, updates: Sequence[Tuple[Union[int, str], UpdateSchemaType]]
+    ) -> None:
         async with self.db_session_factory() as session:
-            return await self.repository.exists(session, **filters)
+            return await self.repository.update_many(session, updates)
 
-    async def find_one(self, **filters) -> ResponseSchemaType | None:
+    async def delete_many(self, pks: Sequence[Union[int, str]]) -> None:
         async with self.db_session_factory() as session:
-            record = await self.repository.find_one(session, **filters)
+            return await self.repository.delete_many(session, pks)
+
+    async def find_by_ids(
+        self, pks: Sequence[Union[int, str]], fields: Optional[Sequence[str]] = None
+    ) -> List[ResponseSchemaType] | List[dict]:
+        async with self.db_session_factory(read_only=True) as session:
+            records = await self.repository.find_by_ids(session, pks, fields=fields)
+            if fields:
+                return [self._project(record, fields) for record in records]
+            return [self.response_schema.model_validate(record) for record in records]
+
+    async def exists(self, **filters) -> bool:
+        async with self.db_session_factory(read_only=True) as session:
+            return await self.repository.exists(session, **filters)
+
+    async def find_one(
+        self, fields: Optional[Sequence[str]] = None, **filters
+    ) -> ResponseSchemaType | dict | None:
+        async with self.db_session_factory(read_only=True) as session:
+            record = await self.repository.find_one(session, fields=fields, **filters)
 
             if not record:
                 return None
 
+            if fields:
+                return self._project(record, fields)
             return self.response_schema.model_validate(record)
 
     async def find_all(
-        self, order: str = "id", limit: int = 100, offset: int = 0, **filters
-    ) -> List[ResponseSchemaType]:
-        async with self.db_session_factory() as session:
+        self,
+        order: str = "id",
+        limit: int = 100,
+        offset: int = 0,
+        before: Optional[Union[int, str]] = None,
+        after: Optional[Union[int, str]] = None,
+        fields: Optional[Sequence[str]] = None,
+        **filters,
+    ) -> List[ResponseSchemaType] | List[dict]:
+        async with self.db_session_factory(
+            read_only=True, history=self.history_reads
+        ) as session:
             records = await self.repository.find_all(
-                session, order=order, limit=limit, offset=offset, **filters
+                session,
+                order=order,
+                limit=limit,
+                offset=offset,
+                before=before,
+                after=after,
+                fields=fields,
+                **filters,
             )
+            if fields:
+                return [self._project(record, fields) for record in records]
             return [self.response_schema.model_validate(record) for record in records]
@@ -0,0 +1,36 @@
+from typing import List, Optional
+
+from app.db.mongo import mongo_db
+from app.models.mongo.models import ArchiveSegmentModel
+from app.repositories.archive_repository import ArchiveSegmentRepository
+from app.schemas.archive import ArchiveSegmentResponse
+from app.services._service import BaseService
+
+
+class ArchiveSegmentService(BaseService):
+    def __init__(self) -> None:
+        self.repository = ArchiveSegmentRepository(
+            ArchiveSegmentModel, "archive_segments"
+        )
+        self.response_schema = ArchiveSegmentResponse
+        self.db_session_factory = mongo_db
+        self.history_reads = True
+
+    async def find_segments(
+        self,
+        conversation_id: str,
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        segment_after: Optional[str] = None,
+    ) -> List[ArchiveSegmentResponse]:
+        async with self.db_session_factory(read_only=True, history=True) as session:
+            records = await self.repository.find_segments(
+                session,
+                conversation_id,
+                limit,
+                before=before,
+                after=after,
+                segment_after=segment_after,
+            )
+            return [self.response_schema.model_validate(record) for record in records]
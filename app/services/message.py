@@ -1,12 +1,102 @@
+from typing import List, Optional, Sequence
+
+from bson import ObjectId
+
 from app.db.mongo import mongo_db
 from app.models.mongo.models import MessageModel
 from app.repositories.message_repository import MessageRepository
-from app.schemas.message import MessageResponse
+from app.schemas.message import DBMessage, MessageResponse
 from app.services._service import BaseService
 
+HISTORY_FIELDS = ["id", "authorId", "conversationId", "content", "seq"]
+
 
 class MessageService(BaseService):
     def __init__(self) -> None:
         self.repository = MessageRepository(MessageModel, "messages")
         self.response_schema = MessageResponse
         self.db_session_factory = mongo_db
+
+    async def find_after(
+        self,
+        conversation_id: str,
+        limit: int,
+        after_id: Optional[str] = None,
+        after_seq: Optional[int] = None,
+    ) -> List[DBMessage]:
+        # catch-up after a reconnect, a lagging secondary could miss messages
+        # already drained from redis and the client would skip past them
+        async with self.db_session_factory(read_only=True) as session:
+            records = await self.repository.find_after(
+                session,
+                conversation_id,
+                limit,
+                after_id=after_id,
+                after_seq=after_seq,
+                fields=HISTORY_FIELDS,
+            )
+            return [DBMessage.from_document(record) for record in records]
+
+    async def max_seq(self, conversation_id: str) -> int:
+        async with self.db_session_factory(read_only=True) as session:
+            return await self.repository.max_seq(session, conversation_id)
+
+    async def find_history(
+        self,
+        conversation_id: str,
+        limit: int,
+        order: str = "-id",
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        history: bool = True,
+    ) -> List[DBMessage]:
+        # skips response validation, history pages are large and read often
+        async with self.db_session_factory(read_only=True, history=history) as session:
+            records = await self.repository.find_all(
+                session,
+                order=order,
+                limit=limit,
+                before=before,
+                after=after,
+                fields=HISTORY_FIELDS,
+                conversationId=conversation_id,
+            )
+            return [DBMessage.from_document(record) for record in records]
+
+    async def last_messages(self, conversation_ids: List[str]) -> List[dict]:
+        if not conversation_ids:
+            return []
+
+        async with self.db_session_factory(read_only=True, history=True) as session:
+            return await self.repository.last_messages(session, conversation_ids)
+
+    async def search(
+        self,
+        query: str,
+        conversation_ids: List[str],
+        limit: int,
+        after_score: Optional[float] = None,
+        after_id: Optional[str] = None,
+        exclude_ids: Sequence[str] = (),
+    ) -> List[dict]:
+        if not conversation_ids:
+            return []
+
+        async with self.db_session_factory(read_only=True, history=True) as session:
+            return await self.repository.search(
+                session,
+                query,
+                conversation_ids,
+                limit,
+                after_score=after_score,
+                after_id=after_id,
+                exclude_ids=exclude_ids,
+            )
+
+    async def conversations_before(self, cutoff: ObjectId) -> List[str]:
+        async with self.db_session_factory(read_only=True) as session:
+            return await self.repository.conversations_before(session, cutoff)
+
+    async def mark_archived(self, ids: List[str]) -> None:
+        async with self.db_session_factory() as session:
+            await self.repository.mark_archived(session, ids)
@@ -0,0 +1,18 @@
+from typing import List, Tuple
+
+from app.db.mongo import mongo_db
+from app.models.mongo.models import ReadPositionModel
+from app.repositories.read_position_repository import ReadPositionRepository
+from app.schemas.read_position import ReadPositionResponse
+from app.services._service import BaseService
+
+
+class ReadPositionService(BaseService):
+    def __init__(self) -> None:
+        self.repository = ReadPositionRepository(ReadPositionModel, "read_positions")
+        self.response_schema = ReadPositionResponse
+        self.db_session_factory = mongo_db
+
+    async def upsert_many(self, positions: List[Tuple[str, int, str]]) -> None:
+        async with self.db_session_factory() as session:
+            await self.repository.upsert_many(session, positions)
@@ -20,7 +20,7 @@ class RoleService(BaseService):
     async def find_multiple_with_permissions(
         self, role_names: List[str]
     ) -> Sequence[Role]:
-        async with self.db_session_factory() as session:
+        async with self.db_session_factory(read_only=True) as session:
             records = await self.repository.find_multiple_with_permissions(
                 session, role_names
             )
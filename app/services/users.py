@@ -34,7 +34,7 @@ class UserService(BaseService):
             return self.response_schema.model_validate(user)
 
     async def authenticate_user(self, username: str, password: str) -> UserResponse:
-        async with self.db_session_factory() as session:
+        async with self.db_session_factory(read_only=True) as session:
             user = await self.repository.find_one(session, username=username)
             if (
                 not user
@@ -49,7 +49,7 @@ class UserService(BaseService):
             return self.response_schema.model_validate(user)
 
     async def get_user_profile(self, user: UserSchema) -> UserResponse:
-        async with self.db_session_factory() as session:
+        async with self.db_session_factory(read_only=True) as session:
             user_profile = await self.repository.find_one(
                 session, username=user.username
             )
@@ -60,6 +60,6 @@ class UserService(BaseService):
             return self.response_schema.model_validate(user_profile)
 
     async def find_in(self, ids: List[int]) -> List[UserResponse]:
-        async with self.db_session_factory() as session:
+        async with self.db_session_factory(read_only=True) as session:
             users = await self.repository.find_in(session, ids)
             return [self.response_schema.model_validate(record) for record in users]
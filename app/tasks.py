@@ -1,8 +1,12 @@
 import asyncio
 
+from app.archive import MessageArchive
+from app.cache import RedisManager
 from app.config import settings
 from app.kafka.services.mongo import KafkaToMongoDB
 from app.kafka.services.redis import RedisToKafkaService
+from app.services.read_position import ReadPositionService
+from app.utils import flush_read_positions
 from app.worker import celery_app
 
 
@@ -18,7 +22,7 @@ from app.worker import celery_app
 def run_kafka_to_mongo(self):
     async def _run():
         service = KafkaToMongoDB(
-            topic="chat-messages",
+            topic=settings.kafka.topic,
             headers=[
                 ("source", b"kafka"),
                 ("service", b"kafka-to-mongo"),
@@ -63,7 +67,7 @@ def run_kafka_to_mongo(self):
 def run_redis_to_kafka(self):
     async def _run():
         service = RedisToKafkaService(
-            topic="chat-messages",
+            topic=settings.kafka.topic,
             headers=[
                 ("source", b"redis"),
                 ("service", b"redis-to-kafka"),
@@ -89,3 +93,66 @@ def run_redis_to_kafka(self):
             await service.stop()
 
     asyncio.run(_run())
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.run_flush_read_positions",
+    max_retries=3,
+    default_retry_delay=60,
+    soft_time_limit=settings.celery.TASK_SOFT_TIME_LIMIT,
+    time_limit=settings.celery.TASK_TIME_LIMIT,
+    acks_late=True,
+)
+def run_flush_read_positions(self):
+    async def _run():
+        redis = RedisManager()
+        service = ReadPositionService()
+        flushed = 0
+
+        try:
+            await redis.connect()
+            while True:
+                count = await flush_read_positions(service, redis)
+                flushed += count
+                if count < settings.chat.READ_FLUSH_BATCH:
+                    break
+
+            return {
+                "status": "success",
+                "flushed": flushed,
+                "service": "flush-read-positions",
+            }
+        except Exception as e:
+            raise self.retry(exc=e, countdown=min(60 * (2**self.request.retries), 300))
+        finally:
+            await redis.disconnect()
+
+    return asyncio.run(_run())
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.run_archive_messages",
+    max_retries=3,
+    default_retry_delay=60,
+    soft_time_limit=settings.celery.TASK_SOFT_TIME_LIMIT,
+    time_limit=settings.celery.TASK_TIME_LIMIT,
+    acks_late=True,
+)
+def run_archive_messages(self):
+    if not settings.archive.ENABLED:
+        return {"status": "disabled", "service": "archive-messages"}
+
+    async def _run():
+        try:
+            archived = await MessageArchive().archive()
+            return {
+                "status": "success",
+                "archived": archived,
+                "service": "archive-messages",
+            }
+        except Exception as e:
+            raise self.retry(exc=e, countdown=min(60 * (2**self.request.retries), 300))
+
+    return asyncio.run(_run())
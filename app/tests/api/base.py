@@ -13,6 +13,7 @@ async def async_client(test_db, monkeypatch):
     from app.db.postgres import postgres_db 
     
     monkeypatch.setattr(postgres_db, "get_db_session", test_db.get_db_session)
+    monkeypatch.setattr(postgres_db, "get_read_session", test_db.get_read_session)
     
     async with AsyncClient(transport=ASGITransport(app=app), 
                          base_url="http://test") as client:
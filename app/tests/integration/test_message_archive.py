@@ -0,0 +1,120 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+
+from app.archive import MessageArchive
+from app.config import settings
+from app.db.mongo import mongo_db
+from app.schemas.message import MessageContent, MessageCreateWithId
+from app.services.archive import ArchiveSegmentService
+from app.services.message import MessageService
+
+
+class InMemoryObjectStore:
+    def __init__(self):
+        self.objects = {}
+
+    async def put_object(self, key, body, content_type):
+        self.objects[key] = body
+
+    async def get_object(self, key):
+        return self.objects[key]
+
+
+def _old_id(minutes):
+    created = (
+        datetime.now(timezone.utc) - timedelta(days=365) + timedelta(minutes=minutes)
+    )
+    return ObjectId(int(created.timestamp()).to_bytes(4, "big") + os.urandom(8))
+
+
+@pytest_asyncio.fixture
+async def conversation(monkeypatch):
+    monkeypatch.setattr(settings.archive, "SEGMENT_SIZE", 4)
+
+    conv_id = str(ObjectId())
+    ids = [_old_id(i) for i in range(10)]
+    await MessageService().create_many(
+        [
+            MessageCreateWithId(
+                id=str(_id),
+                authorId=1,
+                conversationId=conv_id,
+                content=MessageContent(type="TEXT", text=f"message {i}"),
+                source="cache",
+            )
+            for i, _id in enumerate(ids)
+        ]
+    )
+
+    yield conv_id, [str(_id) for _id in ids]
+
+    await mongo_db._db.messages.delete_many({"conversationId": conv_id})
+    await mongo_db._db.archive_segments.delete_many({"conversationId": conv_id})
+
+
+@pytest.fixture
+def store():
+    return InMemoryObjectStore()
+
+
+@pytest.fixture
+def archive(store):
+    return MessageArchive(aws_factory=lambda: store)
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio(loop_scope="session")
+class TestMessageArchive:
+    @pytest.mark.positive
+    async def test_archive_moves_messages_out_of_mongo(
+        self, conversation, store, archive
+    ):
+        conv_id, ids = conversation
+        cutoff = ObjectId.from_datetime(
+            datetime.now(timezone.utc) - timedelta(days=180)
+        )
+
+        archived = await archive.archive_conversation(conv_id, cutoff)
+
+        assert archived == len(ids)
+        assert len(store.objects) == 3
+        assert not await MessageService().exists(conversationId=conv_id)
+
+        segments = await ArchiveSegmentService().find_segments(conv_id, 10)
+        assert len(segments) == 3
+        assert all(segment.archivedAt for segment in segments)
+
+    @pytest.mark.positive
+    async def test_page_back_through_archive(self, conversation, archive):
+        conv_id, ids = conversation
+        cutoff = ObjectId.from_datetime(
+            datetime.now(timezone.utc) - timedelta(days=180)
+        )
+        await archive.archive_conversation(conv_id, cutoff)
+
+        seen = []
+        before = None
+        while True:
+            page = await archive.load(conv_id, 3, before=before)
+            if not page:
+                break
+            seen.extend(m["_id"] for m in page)
+            before = page[-1]["_id"].upper()
+
+        assert seen == ids[::-1]
+
+    @pytest.mark.positive
+    async def test_page_forward_through_archive(self, conversation, archive):
+        conv_id, ids = conversation
+        cutoff = ObjectId.from_datetime(
+            datetime.now(timezone.utc) - timedelta(days=180)
+        )
+        await archive.archive_conversation(conv_id, cutoff)
+
+        page = await archive.load(conv_id, 5, after=ids[2])
+
+        assert [m["_id"] for m in page] == ids[3:8]
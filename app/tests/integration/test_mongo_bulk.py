@@ -0,0 +1,94 @@
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+
+from app.db.mongo import mongo_db
+from app.exceptions import RecordAlreadyExists
+from app.schemas.message import MessageContent, MessageCreateWithId, MessageUpdate
+from app.services.message import MessageService
+
+
+def _message(conv_id, text, message_id=None):
+    return MessageCreateWithId(
+        id=message_id or str(ObjectId()),
+        authorId=1,
+        conversationId=conv_id,
+        content=MessageContent(type="TEXT", text=text),
+        source="cache",
+    )
+
+
+@pytest_asyncio.fixture
+async def conv_id():
+    conv_id = str(ObjectId())
+    yield conv_id
+    await mongo_db._db.messages.delete_many({"conversationId": conv_id})
+
+
+@pytest.mark.asyncio
+class TestMongoBulk:
+    @pytest.mark.positive
+    async def test_create_many(self, conv_id):
+        service = MessageService()
+
+        created = await service.create_many(
+            [_message(conv_id, "first"), _message(conv_id, "second")]
+        )
+        found = await service.find_by_ids([m.id for m in created])
+
+        assert [m.content.text for m in created] == ["first", "second"]
+        assert {m.content.text for m in found} == {"first", "second"}
+
+    @pytest.mark.positive
+    async def test_update_many(self, conv_id):
+        service = MessageService()
+        first, second = await service.create_many(
+            [_message(conv_id, "first"), _message(conv_id, "second")]
+        )
+
+        await service.update_many(
+            [
+                (
+                    first.id,
+                    MessageUpdate(content=MessageContent(type="TEXT", text="edited")),
+                )
+            ]
+        )
+        found = {m.id: m for m in await service.find_by_ids([first.id, second.id])}
+
+        assert found[first.id].content.text == "edited"
+        assert found[second.id].content.text == "second"
+
+    @pytest.mark.positive
+    async def test_delete_many(self, conv_id):
+        service = MessageService()
+        messages = await service.create_many(
+            [_message(conv_id, text) for text in ("first", "second", "third")]
+        )
+
+        await service.delete_many([messages[0].id, messages[1].id])
+        found = await service.find_by_ids([m.id for m in messages])
+
+        assert [m.content.text for m in found] == ["third"]
+
+    @pytest.mark.negative
+    async def test_duplicate_id_raises_already_exists(self, conv_id):
+        service = MessageService()
+        message_id = str(ObjectId())
+        await service.create_many([_message(conv_id, "first", message_id)])
+
+        with pytest.raises(RecordAlreadyExists):
+            await service.create_many([_message(conv_id, "again", message_id)])
+
+    @pytest.mark.negative
+    async def test_duplicate_in_batch_raises_already_exists(self, conv_id):
+        service = MessageService()
+        message_id = str(ObjectId())
+
+        with pytest.raises(RecordAlreadyExists):
+            await service.create_many(
+                [
+                    _message(conv_id, "first", message_id),
+                    _message(conv_id, "again", message_id),
+                ]
+            )
@@ -0,0 +1,107 @@
+import pytest
+
+from app.exceptions import RecordAlreadyExists
+from app.models.models import Role
+from app.repositories.role_repository import RoleRepository
+from app.schemas.role import RoleCreate, RoleResponse, RoleUpdate
+from app.services._service import BaseService
+
+
+@pytest.fixture
+def repository():
+    return RoleRepository(Role)
+
+
+@pytest.mark.asyncio
+class TestRoleRepositoryBulk:
+    @pytest.mark.positive
+    async def test_create_many(self, test_db, repository):
+        async with test_db.get_db_session() as create_session:
+            roles = await repository.create_many(
+                create_session,
+                [
+                    RoleCreate(name="admin", description="admin role"),
+                    RoleCreate(name="user", description="user role"),
+                ],
+            )
+            await create_session.commit()
+
+        assert [role.name for role in roles] == ["admin", "user"]
+        assert all(role.id is not None for role in roles)
+
+        async with test_db.get_db_session() as read_session:
+            found = await repository.find_by_ids(read_session, [r.id for r in roles])
+
+        assert {role.name for role in found} == {"admin", "user"}
+
+    @pytest.mark.positive
+    async def test_update_many(self, test_db, repository):
+        async with test_db.get_db_session() as create_session:
+            roles = await repository.create_many(
+                create_session,
+                [
+                    RoleCreate(name="admin", description="admin role"),
+                    RoleCreate(name="user", description="user role"),
+                ],
+            )
+            await create_session.commit()
+
+        async with test_db.get_db_session() as update_session:
+            await repository.update_many(
+                update_session,
+                [
+                    (roles[0].id, RoleUpdate(description="new admin role")),
+                    (roles[1].id, RoleUpdate(name="member")),
+                ],
+            )
+
+        async with test_db.get_db_session() as read_session:
+            admin = await repository.find_one(read_session, id=roles[0].id)
+            member = await repository.find_one(read_session, id=roles[1].id)
+
+        assert admin.name == "admin"
+        assert admin.description == "new admin role"
+        assert member.name == "member"
+        assert member.description == "user role"
+
+    @pytest.mark.positive
+    async def test_delete_many(self, test_db, repository):
+        async with test_db.get_db_session() as create_session:
+            roles = await repository.create_many(
+                create_session,
+                [
+                    RoleCreate(name="first", description="first role"),
+                    RoleCreate(name="second", description="second role"),
+                    RoleCreate(name="third", description="third role"),
+                ],
+            )
+            await create_session.commit()
+
+        async with test_db.get_db_session() as delete_session:
+            await repository.delete_many(delete_session, [roles[0].id, roles[1].id])
+
+        async with test_db.get_db_session() as read_session:
+            remaining = await repository.find_all(read_session)
+
+        assert [role.name for role in remaining] == ["third"]
+
+    @pytest.mark.negative
+    async def test_create_many_duplicate_raises_already_exists(
+        self, test_db, repository
+    ):
+        service = BaseService(repository, RoleResponse, test_db)
+        await service.create_many([RoleCreate(name="admin", description="admin")])
+
+        with pytest.raises(RecordAlreadyExists):
+            await service.create_many(
+                [
+                    RoleCreate(name="user", description="user role"),
+                    RoleCreate(name="admin", description="admin again"),
+                ]
+            )
+
+        async with test_db.get_db_session() as read_session:
+            roles = await repository.find_all(read_session)
+
+        # the batch is one statement, nothing from it is kept
+        assert [role.name for role in roles] == ["admin"]
@@ -0,0 +1,18 @@
+import pytest_asyncio
+from fakeredis import FakeAsyncRedis
+
+from app.cache import RedisManager
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def clean_db():
+    # unit tests run without postgres, nothing to reset
+    yield
+
+
+@pytest_asyncio.fixture
+async def redis():
+    manager = RedisManager()
+    manager._redis = FakeAsyncRedis(decode_responses=True)
+    yield manager
+    await manager.disconnect()
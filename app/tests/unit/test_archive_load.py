@@ -0,0 +1,97 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.archive import MessageArchive, encode_segment
+from app.config import settings
+
+IDS = sorted(str(ObjectId()) for _ in range(12))
+
+
+class InMemoryObjectStore:
+    def __init__(self):
+        self.objects = {}
+
+    async def put_object(self, key, body, content_type):
+        self.objects[key] = body
+
+    async def get_object(self, key):
+        return self.objects[key]
+
+
+class FakeSegmentService:
+    # same filters and order as ArchiveSegmentRepository.find_segments
+    def __init__(self, segments):
+        self.segments = segments
+        self.calls = 0
+
+    async def find_segments(
+        self, conv_id, limit, before=None, after=None, segment_after=None
+    ):
+        self.calls += 1
+        segments = self.segments
+        if after is not None:
+            bound = max(after, segment_after or "")
+            segments = sorted(
+                (s for s in segments if s.lastId > bound), key=lambda s: s.lastId
+            )
+        else:
+            if before is not None:
+                segments = [s for s in segments if s.firstId < before]
+            if segment_after is not None:
+                segments = [s for s in segments if s.lastId < segment_after]
+            segments = sorted(segments, key=lambda s: s.lastId, reverse=True)
+        return segments[:limit]
+
+
+@pytest.fixture
+def archive(monkeypatch):
+    # one message per segment, like hourly runs over a quiet conversation
+    monkeypatch.setattr(settings.archive, "SEGMENT_SIZE", 100)
+
+    store = InMemoryObjectStore()
+    segments = []
+    for message_id in IDS:
+        key = f"archive/conv/{message_id}"
+        store.objects[key] = encode_segment([{"_id": message_id, "text": message_id}])
+        segments.append(SimpleNamespace(key=key, firstId=message_id, lastId=message_id))
+
+    archive = MessageArchive(aws_factory=lambda: store)
+    archive.segments = FakeSegmentService(segments)
+    return archive
+
+
+@pytest.mark.asyncio
+class TestMessageArchiveLoad:
+    @pytest.mark.positive
+    async def test_newest_page_reads_past_small_segments(self, archive):
+        page = await archive.load("conv", 5)
+
+        assert [m["_id"] for m in page] == IDS[-1:-6:-1]
+        assert archive.segments.calls > 1
+
+    @pytest.mark.positive
+    async def test_backward_pages_cover_the_archive(self, archive):
+        seen = []
+        before = None
+        while True:
+            page = await archive.load("conv", 5, before=before)
+            if not page:
+                break
+            seen.extend(m["_id"] for m in page)
+            before = page[-1]["_id"]
+
+        assert seen == IDS[::-1]
+
+    @pytest.mark.positive
+    async def test_forward_page_reads_past_small_segments(self, archive):
+        page = await archive.load("conv", 5, after=IDS[2])
+
+        assert [m["_id"] for m in page] == IDS[3:8]
+
+    @pytest.mark.positive
+    async def test_short_page_only_at_the_end(self, archive):
+        page = await archive.load("conv", 5, before=IDS[3])
+
+        assert [m["_id"] for m in page] == IDS[2::-1]
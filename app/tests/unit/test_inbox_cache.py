@@ -0,0 +1,82 @@
+import pytest
+from bson import ObjectId
+
+from app.config import settings
+from app.enum import WriteMode
+
+CONV_ID = str(ObjectId())
+
+
+@pytest.mark.asyncio
+class TestRebuildInbox:
+    @pytest.mark.positive
+    async def test_replaces_participants(self, redis):
+        await redis.set_participants(CONV_ID, [1, 2, 3])
+
+        await redis.rebuild_inbox(1, [(CONV_ID, 1000, [1, 2], None)])
+
+        members = await redis._redis.smembers(f"chat:{CONV_ID}:participants")
+        assert members == {"1", "2"}
+
+    @pytest.mark.positive
+    async def test_orders_inbox_by_last_activity(self, redis):
+        older, newer = str(ObjectId()), str(ObjectId())
+
+        await redis.rebuild_inbox(
+            1, [(newer, 2000, [1], None), (older, 1000, [1], None)]
+        )
+
+        page = await redis.get_inbox(1, 0, 10)
+        assert [conv_id for conv_id, _, _ in page] == [newer, older]
+
+
+def _message(seq):
+    return {
+        "_id": str(ObjectId()),
+        "conversationId": CONV_ID,
+        "authorId": 1,
+        "seq": seq,
+        "content": {"text": f"hello {seq}"},
+    }
+
+
+@pytest.mark.asyncio
+class TestDirectModeReads:
+    @pytest.fixture(autouse=True)
+    def direct_mode(self, monkeypatch):
+        monkeypatch.setattr(settings.chat, "WRITE_MODE", WriteMode.DIRECT)
+
+    @pytest.mark.positive
+    async def test_reads_fallback_messages_with_the_tail(self, redis):
+        sent, fallback, latest = _message(1), _message(2), _message(3)
+        await redis.add_tail_messages(CONV_ID, [sent])
+        # kafka was down for this one, it waits for the drainer
+        await redis.add_messages(CONV_ID, [fallback])
+        await redis.add_tail_messages(CONV_ID, [latest])
+
+        messages = await redis.get_messages(CONV_ID, 10)
+
+        assert [m["_id"] for m in messages] == [
+            sent["_id"],
+            fallback["_id"],
+            latest["_id"],
+        ]
+
+    @pytest.mark.positive
+    async def test_batch_size_applies_across_both_lists(self, redis):
+        messages = [_message(seq) for seq in range(1, 5)]
+        await redis.add_tail_messages(CONV_ID, messages[::2])
+        await redis.add_messages(CONV_ID, messages[1::2])
+
+        page = await redis.get_messages(CONV_ID, 2)
+
+        assert [m["_id"] for m in page] == [m["_id"] for m in messages[2:]]
+
+    @pytest.mark.positive
+    async def test_search_finds_fallback_messages(self, redis):
+        fallback = _message(1)
+        await redis.add_messages(CONV_ID, [fallback])
+
+        hits = await redis.search_messages([CONV_ID], ["hello"], 10)
+
+        assert [m["_id"] for m in hits] == [fallback["_id"]]
@@ -0,0 +1,127 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.exceptions import RecordAlreadyExists
+from app.kafka.serializers import JSONCodec
+from app.kafka.services.mongo import KafkaToMongoDB
+from app.schemas.message import MessageContent, MessageCreateWithId
+
+CONV_ID = str(ObjectId())
+
+
+def _message(seq, message_id=None):
+    return MessageCreateWithId(
+        id=message_id or str(ObjectId()),
+        authorId=1,
+        conversationId=CONV_ID,
+        content=MessageContent(type="TEXT", text=f"message {seq}"),
+        source="cache",
+        seq=seq,
+    )
+
+
+class FakeMessageService:
+    # unique _id and unique (conversationId, seq), like the messages indexes
+    def __init__(self, stored=()):
+        self.stored = {m.id: m for m in stored}
+        self.creates = 0
+
+    def _conflicts(self, message):
+        return message.id in self.stored or any(
+            m.conversationId == message.conversationId and m.seq == message.seq
+            for m in self.stored.values()
+            if message.seq is not None
+        )
+
+    async def create(self, message):
+        self.creates += 1
+        if self._conflicts(message):
+            raise RecordAlreadyExists(detail="Record already exists")
+        self.stored[message.id] = message.model_copy()
+        return message
+
+    async def create_many(self, messages):
+        if any(self._conflicts(m) for m in messages):
+            raise RecordAlreadyExists(detail="Record already exists")
+        return [await self.create(m) for m in messages]
+
+    async def exists(self, id):
+        return id in self.stored
+
+
+class FakeConsumer:
+    def __init__(self, messages):
+        self.messages = messages
+        self.commits = 0
+
+    async def consume_batch(self, max_records, timeout):
+        return [
+            SimpleNamespace(value=JSONCodec().dumps(m.model_dump(by_alias=True)))
+            for m in self.messages
+        ]
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+async def service(redis):
+    # the counter is ahead of what was already stored
+    await redis._redis.set(f"chat:{CONV_ID}:seq", 10)
+    service = KafkaToMongoDB("topic", headers=[])
+    service.redis = redis
+    return service
+
+
+@pytest.mark.asyncio
+class TestPersistOne:
+    @pytest.mark.positive
+    async def test_redelivered_message_is_skipped(self, service):
+        stored = _message(seq=3)
+        service.mongo = FakeMessageService([stored])
+
+        persisted = await service._persist_one(_message(seq=3, message_id=stored.id))
+
+        assert persisted.id == stored.id
+        assert service.mongo.creates == 1
+        assert len(service.mongo.stored) == 1
+
+    @pytest.mark.positive
+    async def test_duplicate_seq_gets_a_fresh_seq(self, service):
+        service.mongo = FakeMessageService([_message(seq=3)])
+        message = _message(seq=3)
+
+        persisted = await service._persist_one(message)
+
+        assert persisted.seq == 11
+        assert service.mongo.stored[message.id].seq == 11
+
+    @pytest.mark.negative
+    async def test_duplicate_without_seq_raises(self, service):
+        service.mongo = FakeMessageService([_message(seq=None)])
+        service.mongo._conflicts = lambda message: True
+
+        with pytest.raises(RecordAlreadyExists):
+            await service._persist_one(_message(seq=None))
+
+
+@pytest.mark.asyncio
+class TestProcessFallback:
+    @pytest.mark.positive
+    async def test_batch_with_duplicates_persists_the_rest(self, service):
+        redelivered = _message(seq=1)
+        service.mongo = FakeMessageService([redelivered])
+        collided, fresh = _message(seq=1), _message(seq=12)
+        service.consumer = FakeConsumer(
+            [_message(seq=1, message_id=redelivered.id), collided, fresh]
+        )
+        service._closed = False
+        service._ready.set()
+
+        await service.process()
+
+        assert set(service.mongo.stored) == {redelivered.id, collided.id, fresh.id}
+        assert service.mongo.stored[collided.id].seq == 11
+        assert service.consumer.commits == 1
@@ -0,0 +1,137 @@
+import pytest
+from bson import ObjectId
+
+from app.schemas.message import CacheMessage, DBMessage
+from app.utils import _merge_sorted, load_messages
+
+CONV_ID = str(ObjectId())
+IDS = sorted(str(ObjectId()) for _ in range(10))
+
+
+def _document(message_id):
+    return {
+        "_id": message_id,
+        "authorId": 1,
+        "conversationId": CONV_ID,
+        "content": {"type": "TEXT", "text": message_id, "attachments": []},
+    }
+
+
+def _cached(message_id):
+    return CacheMessage.model_validate({**_document(message_id), "source": "cache"})
+
+
+def _stored(message_id):
+    return DBMessage.from_document(_document(message_id))
+
+
+class FakeRedis:
+    def __init__(self, cached_ids):
+        self.cached_ids = cached_ids
+
+    async def get_messages(self, conv_id, batch_size):
+        return [
+            {**_document(i), "source": "cache"} for i in self.cached_ids[-batch_size:]
+        ]
+
+    async def get_history(self, conv_id, limit, before=None):
+        return None
+
+    async def history_generation(self, conv_id):
+        return ""
+
+    async def fill_history(self, conv_id, messages, complete, generation):
+        return False
+
+
+class FakeMessageService:
+    def __init__(self, stored_ids):
+        self.stored_ids = stored_ids
+        self.calls = []
+
+    async def find_history(
+        self, conv_id, limit, order="-id", before=None, after=None, history=True
+    ):
+        self.calls.append(limit)
+        ids = [i for i in self.stored_ids if (not before or i < before)]
+        ids = [i for i in ids if (not after or i > after)]
+        ids.sort(reverse=order.startswith("-"))
+        return [_stored(i) for i in ids[:limit]]
+
+
+class CountingStream:
+    def __init__(self, messages):
+        self.messages = messages
+        self.consumed = 0
+
+    def __iter__(self):
+        for message in self.messages:
+            self.consumed += 1
+            yield message
+
+
+class TestMergeSorted:
+    @pytest.mark.positive
+    def test_drops_duplicate_ids(self):
+        cached = [_cached(i) for i in IDS[6:]][::-1]
+        stored = [_stored(i) for i in IDS[:8]][::-1]
+
+        page = _merge_sorted([cached, stored], 10, True)
+
+        assert [m.id for m in page] == IDS[::-1]
+
+    @pytest.mark.positive
+    def test_keeps_first_copy_of_duplicate(self):
+        page = _merge_sorted([[_cached(IDS[0])], [_stored(IDS[0])]], 5, False)
+
+        assert len(page) == 1
+
+    @pytest.mark.positive
+    def test_stops_at_limit(self):
+        cached = CountingStream([_cached(i) for i in IDS[5:]][::-1])
+        stored = CountingStream([_stored(i) for i in IDS][::-1])
+
+        page = _merge_sorted([cached, stored], 3, True)
+
+        assert [m.id for m in page] == IDS[-1:-4:-1]
+        assert cached.consumed + stored.consumed <= 3 + 2 + 1
+
+    @pytest.mark.positive
+    def test_oldest_first(self):
+        page = _merge_sorted(
+            [[_cached(i) for i in IDS[4:]], [_stored(i) for i in IDS[:6]]], 4, False
+        )
+
+        assert [m.id for m in page] == IDS[:4]
+
+
+@pytest.mark.asyncio
+class TestLoadMessages:
+    @pytest.mark.positive
+    async def test_newest_page_dedupes_cache_and_db(self):
+        redis = FakeRedis(IDS[6:])
+        service = FakeMessageService(IDS[:8])
+
+        page = await load_messages(service, redis, CONV_ID, limit=5)
+
+        assert [m.id for m in page] == IDS[5:]
+        assert [m.source for m in page] == ["db", "cache", "cache", "cache", "cache"]
+
+    @pytest.mark.positive
+    async def test_backward_page_is_bounded(self):
+        redis = FakeRedis(IDS[6:])
+        service = FakeMessageService(IDS[:8])
+
+        page = await load_messages(service, redis, CONV_ID, limit=3, before=IDS[7])
+
+        assert [m.id for m in page] == IDS[4:7]
+        assert all(limit <= 3 for limit in service.calls)
+
+    @pytest.mark.positive
+    async def test_forward_page(self):
+        redis = FakeRedis(IDS[6:])
+        service = FakeMessageService(IDS[:8])
+
+        page = await load_messages(service, redis, CONV_ID, limit=4, after=IDS[3])
+
+        assert [m.id for m in page] == IDS[4:8]
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from app.kafka import producers
+from app.kafka.producers import Producer
+from app.types.message import RecordMetadata
+
+
+class RecordingChannel:
+    def __init__(self):
+        self.published = []
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish_message(self, fut, wait=True):
+        self.published.append(fut.message.value)
+        fut.set_result(
+            RecordMetadata(
+                topic=fut.message.topic,
+                partition=0,
+                topic_partition=None,
+                offset=len(self.published),
+                timestamp=None,
+            )
+        )
+
+
+@pytest.fixture(autouse=True)
+def channel(monkeypatch):
+    monkeypatch.setattr(producers, "ProducerChannel", RecordingChannel)
+
+
+async def _producer(linger):
+    producer = Producer(linger=linger)
+    await producer.start()
+    return producer
+
+
+@pytest.mark.asyncio
+class TestProducerLinger:
+    @pytest.mark.positive
+    async def test_sends_are_flushed_in_the_background(self):
+        producer = await _producer(linger=0.01)
+        futures = [await producer.send("topic", value=i) for i in range(3)]
+
+        assert producer._channel.published == []
+
+        await asyncio.wait_for(asyncio.gather(*futures), timeout=1)
+        assert producer._channel.published == [0, 1, 2]
+        await producer.close()
+
+    @pytest.mark.positive
+    async def test_close_flushes_pending_sends(self):
+        producer = await _producer(linger=60)
+
+        fut = await producer.send("topic", value="last")
+        await producer.close()
+
+        assert fut.done()
+        assert producer._channel.published == ["last"]
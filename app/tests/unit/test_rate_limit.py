@@ -0,0 +1,91 @@
+import pytest
+
+from app.chat.ratelimit import LocalTokenBucket
+from app.config import RateLimitRule
+
+RULE = RateLimitRule(rate=1.0, burst=2)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+class TestLocalTokenBucket:
+    @pytest.mark.positive
+    def test_allows_burst_then_denies(self, clock):
+        bucket = LocalTokenBucket(max_owners=10, clock=clock)
+
+        assert bucket.acquire("sid:1", "send_message", RULE)
+        assert bucket.acquire("sid:1", "send_message", RULE)
+        assert not bucket.acquire("sid:1", "send_message", RULE)
+
+    @pytest.mark.positive
+    def test_refills_at_rate(self, clock):
+        bucket = LocalTokenBucket(max_owners=10, clock=clock)
+        bucket.acquire("sid:1", "send_message", RULE)
+        bucket.acquire("sid:1", "send_message", RULE)
+
+        clock.now += 0.5
+        assert not bucket.acquire("sid:1", "send_message", RULE)
+
+        clock.now += 1
+        assert bucket.acquire("sid:1", "send_message", RULE)
+
+    @pytest.mark.positive
+    def test_refill_is_capped_at_burst(self, clock):
+        bucket = LocalTokenBucket(max_owners=10, clock=clock)
+        bucket.acquire("sid:1", "send_message", RULE)
+
+        clock.now += 100
+        results = [bucket.acquire("sid:1", "send_message", RULE) for _ in range(3)]
+
+        assert results == [True, True, False]
+
+    @pytest.mark.positive
+    def test_buckets_are_per_owner_and_event(self, clock):
+        bucket = LocalTokenBucket(max_owners=10, clock=clock)
+        bucket.acquire("sid:1", "send_message", RULE)
+        bucket.acquire("sid:1", "send_message", RULE)
+
+        assert bucket.acquire("sid:2", "send_message", RULE)
+        assert bucket.acquire("sid:1", "mark_read", RULE)
+
+    @pytest.mark.positive
+    def test_evicts_least_recently_used_owner_when_full(self, clock):
+        bucket = LocalTokenBucket(max_owners=2, clock=clock)
+        bucket.acquire("sid:1", "send_message", RULE)
+        bucket.acquire("sid:2", "send_message", RULE)
+        bucket.acquire("sid:1", "mark_read", RULE)
+
+        bucket.acquire("sid:3", "send_message", RULE)
+
+        assert list(bucket._buckets) == ["sid:1", "sid:3"]
+
+    @pytest.mark.positive
+    def test_stays_bounded_when_every_owner_is_busy(self, clock):
+        bucket = LocalTokenBucket(max_owners=3, clock=clock)
+
+        for i in range(10):
+            bucket.acquire(f"sid:{i}", "send_message", RULE)
+
+        assert list(bucket._buckets) == ["sid:7", "sid:8", "sid:9"]
+
+    @pytest.mark.positive
+    def test_forget_drops_owner(self, clock):
+        bucket = LocalTokenBucket(max_owners=10, clock=clock)
+        bucket.acquire("sid:1", "send_message", RULE)
+        bucket.acquire("sid:1", "send_message", RULE)
+
+        bucket.forget("sid:1")
+
+        assert "sid:1" not in bucket._buckets
+        assert bucket.acquire("sid:1", "send_message", RULE)
@@ -0,0 +1,163 @@
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from app.chat import chat
+from app.chat.chat import ChatServer
+
+READER, AUTHOR = 1, 2
+
+
+def _message(conv_id, seq=None):
+    message = {
+        "_id": str(ObjectId()),
+        "conversationId": conv_id,
+        "authorId": AUTHOR,
+        "content": {"type": "TEXT", "text": "hello"},
+    }
+    if seq is not None:
+        message["seq"] = seq
+    return message
+
+
+async def _conversation(redis, count, with_seq):
+    conv_id = str(ObjectId())
+    await redis.set_participants(conv_id, [READER, AUTHOR])
+    if with_seq:
+        # counter already seeded, new messages take the next numbers
+        await redis._redis.set(f"chat:{conv_id}:seq", 0)
+        messages = [_message(conv_id) for _ in range(count)]
+    else:
+        # seqs given up front leave the counter unset, as after a redis flush
+        messages = [_message(conv_id, seq=0) for _ in range(count)]
+    await redis.add_messages(conv_id, messages)
+    return conv_id, messages
+
+
+async def _unread(redis, conv_id):
+    return (await redis.get_unread(READER, [conv_id]))[0]
+
+
+@pytest.mark.asyncio
+class TestReadMarker:
+    @pytest.mark.positive
+    async def test_seq_gap_lowers_unread(self, redis):
+        conv_id, messages = await _conversation(redis, 5, with_seq=True)
+        assert await _unread(redis, conv_id) == 5
+
+        moved = await redis.mark_read(
+            conv_id, READER, messages[2]["_id"], seq=messages[2]["seq"]
+        )
+
+        assert moved
+        assert await _unread(redis, conv_id) == 2
+
+    @pytest.mark.positive
+    async def test_marker_only_moves_forward(self, redis):
+        conv_id, messages = await _conversation(redis, 5, with_seq=True)
+        await redis.mark_read(conv_id, READER, messages[3]["_id"], seq=4)
+
+        moved = await redis.mark_read(conv_id, READER, messages[1]["_id"], seq=2)
+
+        assert not moved
+        assert await _unread(redis, conv_id) == 1
+        positions = await redis.get_read_positions(conv_id)
+        assert positions[str(READER)] == messages[3]["_id"]
+
+    @pytest.mark.positive
+    async def test_latest_message_clears_without_seq(self, redis):
+        conv_id, messages = await _conversation(redis, 3, with_seq=False)
+
+        await redis.mark_read(conv_id, READER, messages[-1]["_id"])
+
+        assert await _unread(redis, conv_id) == 0
+
+    @pytest.mark.positive
+    async def test_older_message_keeps_unread_without_seq(self, redis):
+        conv_id, messages = await _conversation(redis, 3, with_seq=False)
+
+        moved = await redis.mark_read(conv_id, READER, messages[0]["_id"])
+
+        # nothing tells how many follow, the count stays until the latest is read
+        assert moved
+        assert await _unread(redis, conv_id) == 3
+
+
+class FakeSocketServer:
+    def __init__(self):
+        self.emitted = []
+
+    async def get_session(self, sid):
+        return {"user": SimpleNamespace(id=READER)}
+
+    async def emit(self, event, data, **kwargs):
+        self.emitted.append((event, data))
+
+
+class FakeConversationService:
+    async def find_one(self, id, fields=None):
+        return {"participants": [READER, AUTHOR]}
+
+
+class FakeMessageService:
+    def __init__(self, messages):
+        self.messages = messages
+
+    async def find_one(self, id, conversationId, fields=None):
+        for message in self.messages:
+            if message["_id"] == id and message["conversationId"] == conversationId:
+                return {"seq": message.get("seq")}
+        return None
+
+
+@pytest.fixture
+def server(redis, monkeypatch):
+    monkeypatch.setattr(chat, "ConversationService", FakeConversationService)
+    server = ChatServer(redis)
+    server._sio = FakeSocketServer()
+    return server
+
+
+@pytest.mark.asyncio
+class TestOnMarkRead:
+    @pytest.mark.negative
+    async def test_rejects_message_from_another_conversation(
+        self, server, redis, monkeypatch
+    ):
+        conv_id, _ = await _conversation(redis, 2, with_seq=True)
+        _, other_messages = await _conversation(redis, 1, with_seq=True)
+        monkeypatch.setattr(
+            chat, "MessageService", lambda: FakeMessageService(other_messages)
+        )
+
+        result = await server._on_mark_read("sid", conv_id, other_messages[0]["_id"])
+
+        assert result is None
+        assert server._sio.emitted == [("error", {"message": "Message not found"})]
+        assert await redis.get_read_positions(conv_id) == {}
+        assert await _unread(redis, conv_id) == 2
+
+    @pytest.mark.negative
+    async def test_rejects_unknown_message(self, server, redis, monkeypatch):
+        conv_id, _ = await _conversation(redis, 1, with_seq=True)
+        monkeypatch.setattr(chat, "MessageService", lambda: FakeMessageService([]))
+
+        await server._on_mark_read("sid", conv_id, str(ObjectId()))
+
+        assert server._sio.emitted == [("error", {"message": "Message not found"})]
+        assert await redis.get_read_positions(conv_id) == {}
+
+    @pytest.mark.positive
+    async def test_persisted_message_uses_its_seq(self, server, redis, monkeypatch):
+        conv_id, messages = await _conversation(redis, 3, with_seq=True)
+        # already drained out of the cache, only mongo knows it
+        await redis._redis.delete(f"chat:{conv_id}:messages:{messages[0]['_id']}")
+        monkeypatch.setattr(
+            chat, "MessageService", lambda: FakeMessageService(messages)
+        )
+
+        result = await server._on_mark_read("sid", conv_id, messages[0]["_id"])
+
+        assert result == {"status": "ok"}
+        assert await _unread(redis, conv_id) == 2
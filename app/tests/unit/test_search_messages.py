@@ -0,0 +1,153 @@
+import pytest
+from bson import ObjectId
+
+from app.utils import decode_search_cursor, encode_search_cursor, search_messages
+
+CONV_ID = str(ObjectId())
+IDS = sorted(str(ObjectId()) for _ in range(8))
+
+
+def _document(message_id, score=None):
+    document = {
+        "_id": message_id,
+        "conversationId": CONV_ID,
+        "authorId": 1,
+        "content": {"type": "TEXT", "text": f"hello {message_id}"},
+    }
+    if score is not None:
+        document["score"] = score
+    return document
+
+
+class FakeRedis:
+    def __init__(self, cached_ids):
+        self.cached_ids = cached_ids
+
+    async def get_inbox(self, user_id, offset, limit):
+        return None
+
+    async def search_messages(self, conv_ids, terms, scan):
+        return [_document(i) for i in self.cached_ids]
+
+
+class FakeMessageService:
+    # scores fall with age, keyset on (score desc, _id desc)
+    def __init__(self, stored_ids):
+        self.stored_ids = stored_ids
+
+    async def search(
+        self,
+        query,
+        conversation_ids,
+        limit,
+        after_score=None,
+        after_id=None,
+        exclude_ids=(),
+    ):
+        records = [
+            _document(i, score=float(IDS.index(i)))
+            for i in self.stored_ids
+            if i not in exclude_ids
+        ]
+        records.sort(key=lambda r: (r["score"], r["_id"]), reverse=True)
+        if after_id is not None:
+            records = [
+                r for r in records if (r["score"], r["_id"]) < (after_score, after_id)
+            ]
+        return records[:limit]
+
+
+class FakeConversationService:
+    def __init__(self):
+        self.calls = []
+
+    async def find_all(self, **kwargs):
+        self.calls.append(kwargs)
+        return [{"id": CONV_ID}]
+
+
+async def _all_pages(redis, service, limit):
+    pages = []
+    cursor = None
+    while True:
+        results = await search_messages(
+            None, service, redis, 1, "hello", CONV_ID, limit=limit, cursor=cursor
+        )
+        pages.append([(hit.id, hit.source) for hit in results.messages])
+        if not results.next_cursor:
+            return pages
+        cursor = results.next_cursor
+
+
+@pytest.mark.asyncio
+class TestSearchMessages:
+    @pytest.mark.positive
+    async def test_first_page_is_trimmed_to_limit(self):
+        results = await search_messages(
+            None,
+            FakeMessageService(IDS[:6]),
+            FakeRedis(IDS[4:]),
+            1,
+            "hello",
+            CONV_ID,
+            limit=3,
+        )
+
+        assert [(hit.id, hit.source) for hit in results.messages] == [
+            (IDS[7], "cache"),
+            (IDS[6], "cache"),
+            (IDS[5], "cache"),
+        ]
+        assert results.next_cursor
+
+    @pytest.mark.positive
+    async def test_cache_hits_are_not_served_again_from_db(self):
+        # every cached message is persisted by the time later pages are read
+        redis = FakeRedis(IDS[5:])
+        service = FakeMessageService(IDS)
+
+        pages = await _all_pages(redis, service, limit=3)
+        seen = [message_id for page in pages for message_id, _ in page]
+
+        assert all(len(page) <= 3 for page in pages)
+        assert sorted(seen) == IDS
+        assert len(seen) == len(set(seen))
+
+    @pytest.mark.positive
+    async def test_db_hits_fill_the_rest_of_the_first_page(self):
+        results = await search_messages(
+            None,
+            FakeMessageService(IDS[:6]),
+            FakeRedis(IDS[5:6]),
+            1,
+            "hello",
+            CONV_ID,
+            limit=3,
+        )
+
+        assert [(hit.id, hit.source) for hit in results.messages] == [
+            (IDS[5], "cache"),
+            (IDS[4], "db"),
+            (IDS[3], "db"),
+        ]
+
+    @pytest.mark.positive
+    def test_cursor_round_trip(self):
+        cursor = encode_search_cursor(1.5, IDS[0], IDS[1:3])
+
+        assert decode_search_cursor(cursor) == (1.5, IDS[0], IDS[1:3])
+        assert decode_search_cursor(encode_search_cursor(None, None, IDS[1:2])) == (
+            None,
+            None,
+            IDS[1:2],
+        )
+
+    @pytest.mark.positive
+    async def test_global_scope_searches_newest_conversations(self):
+        conv_service = FakeConversationService()
+
+        await search_messages(
+            conv_service, FakeMessageService(IDS), FakeRedis([]), 1, "hello"
+        )
+
+        assert conv_service.calls[0]["order"] == "-id"
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from engineio import packet as eio_packet
+from engineio.async_socket import AsyncSocket
+from socketio import packet
+
+from app.chat.packets import ChatSocketServer
+from app.enum import SlowConsumerPolicy
+
+EIO_SID = "eio-1"
+
+
+def _frame(data):
+    return eio_packet.Packet(eio_packet.MESSAGE, data)
+
+
+def _server(policy):
+    server = ChatSocketServer(max_queue_size=2, slow_consumer_policy=policy)
+    socket = AsyncSocket(server.eio, EIO_SID)
+    socket.connected = True
+    server.eio.sockets[EIO_SID] = socket
+    return server, socket
+
+
+async def _settle():
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+class TestSlowConsumer:
+    @pytest.mark.positive
+    async def test_drop_oldest_keeps_the_newest_frames(self):
+        server, socket = _server(SlowConsumerPolicy.DROP_OLDEST)
+
+        for text in ("1", "2", "3"):
+            await server._send_eio_packet(EIO_SID, _frame(f'2["e","{text}"]'))
+
+        queued = [socket.queue.get_nowait().data for _ in range(2)]
+        assert queued == ['2["e","2"]', '2["e","3"]']
+
+    @pytest.mark.positive
+    async def test_eviction_does_not_wait_for_the_backlog(self):
+        server, socket = _server(SlowConsumerPolicy.DISCONNECT)
+
+        for text in ("1", "2", "3"):
+            await server._send_eio_packet(EIO_SID, _frame(f'2["e","{text}"]'))
+        await asyncio.wait_for(_settle(), timeout=1)
+
+        assert socket.closed
+        assert EIO_SID not in server.eio.sockets
+        # only the sentinel that stops the writer task is left
+        assert socket.queue.get_nowait() is None
+        assert socket.queue.empty()
+
+    @pytest.mark.positive
+    async def test_binary_event_is_never_split(self):
+        server, socket = _server(SlowConsumerPolicy.DROP_OLDEST)
+        frames = packet.Packet(packet.EVENT, data=["e", b"data"]).encode()
+
+        for frame in frames:
+            await server._send_eio_packet(EIO_SID, _frame(frame))
+        await server._send_eio_packet(EIO_SID, _frame('2["e","1"]'))
+        await asyncio.wait_for(_settle(), timeout=1)
+
+        assert socket.closed
+        assert EIO_SID not in server.eio.sockets
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from app.cache import RedisWriteCoalescer
+
+
+class RecordingRedis:
+    def __init__(self, error=None):
+        self.error = error
+        self.writes = []
+
+    async def add_messages(self, chat_key, messages):
+        await self._write("list", chat_key, messages)
+
+    async def add_tail_messages(self, chat_key, messages):
+        await self._write("tail", chat_key, messages)
+
+    async def _write(self, kind, chat_key, messages):
+        self.writes.append((kind, chat_key, [m["text"] for m in messages]))
+        if self.error:
+            raise self.error
+
+
+@pytest.mark.asyncio
+class TestRedisWriteCoalescer:
+    @pytest.mark.positive
+    async def test_batches_concurrent_writes_per_conversation(self):
+        redis = RecordingRedis()
+        writer = RedisWriteCoalescer(redis, window=0.01, max_batch=100)
+
+        await asyncio.gather(
+            writer.add_message("a", {"text": "1"}),
+            writer.add_message("b", {"text": "2"}),
+            writer.add_message("a", {"text": "3"}),
+        )
+
+        assert sorted(redis.writes) == [
+            ("list", "a", ["1", "3"]),
+            ("list", "b", ["2"]),
+        ]
+
+    @pytest.mark.positive
+    async def test_tail_writes_are_batched_separately(self):
+        redis = RecordingRedis()
+        writer = RedisWriteCoalescer(redis, window=0.01, max_batch=100)
+
+        await asyncio.gather(
+            writer.add_message("a", {"text": "1"}),
+            writer.add_tail_message("a", {"text": "2"}),
+        )
+
+        assert sorted(redis.writes) == [
+            ("list", "a", ["1"]),
+            ("tail", "a", ["2"]),
+        ]
+
+    @pytest.mark.positive
+    async def test_full_batch_flushes_before_the_window(self):
+        redis = RecordingRedis()
+        writer = RedisWriteCoalescer(redis, window=60, max_batch=2)
+
+        await asyncio.wait_for(
+            asyncio.gather(
+                writer.add_message("a", {"text": "1"}),
+                writer.add_message("a", {"text": "2"}),
+            ),
+            timeout=1,
+        )
+
+        assert redis.writes == [("list", "a", ["1", "2"])]
+
+    @pytest.mark.negative
+    async def test_errors_reach_every_waiting_caller(self):
+        redis = RecordingRedis(error=ConnectionError("redis down"))
+        writer = RedisWriteCoalescer(redis, window=0.01, max_batch=100)
+
+        results = await asyncio.gather(
+            writer.add_message("a", {"text": "1"}),
+            writer.add_message("a", {"text": "2"}),
+            return_exceptions=True,
+        )
+
+        assert len(redis.writes) == 1
+        assert all(isinstance(r, ConnectionError) for r in results)
+
+    @pytest.mark.positive
+    async def test_flush_writes_pending_messages(self):
+        redis = RecordingRedis()
+        writer = RedisWriteCoalescer(redis, window=60, max_batch=100)
+
+        pending = asyncio.create_task(writer.add_message("a", {"text": "1"}))
+        await asyncio.sleep(0)
+        await writer.flush()
+        await pending
+
+        assert redis.writes == [("list", "a", ["1"])]
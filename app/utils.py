@@ -1,31 +1,450 @@
-from typing import List
+import asyncio
+import heapq
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from app.cache import RedisManager
+from bson import ObjectId
+
+from app.archive import message_archive
+from app.cache import RedisManager, message_preview
 from app.config import settings
-from app.schemas.message import CacheMessage, DBMessage, MessageType
+from app.kafka.serializers import JSONCodec
+from app.schemas.conversation import Inbox, InboxEntry, ReadReceipts
+from app.schemas.message import (
+    CacheMessage,
+    DBMessage,
+    MessageChanges,
+    MessageType,
+    SearchHit,
+    SearchResults,
+)
+from app.services.conversation import ConversationService
 from app.services.message import MessageService
+from app.services.read_position import ReadPositionService
+
+
+def _message_order(message: MessageType):
+    # messages written before sequencing was introduced sort first, by id
+    return (message.seq if message.seq is not None else -1, message.id)
+
+
+def _merge_sorted(
+    streams: Iterable[List[MessageType]], limit: int, newest_first: bool
+) -> List[MessageType]:
+    # every stream is already sorted by id, the same message may sit in several
+    merged = heapq.merge(*streams, key=lambda m: ObjectId(m.id), reverse=newest_first)
+    page: List[MessageType] = []
+    seen = set()
+    for message in merged:
+        if message.id in seen:
+            continue
+        seen.add(message.id)
+        page.append(message)
+        if len(page) == limit:
+            break
+    return page
+
+
+async def _load_cached(
+    redis: RedisManager,
+    conv_id: str,
+    batch_size: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[CacheMessage]:
+    cached = [
+        CacheMessage.model_validate(r)
+        for r in await redis.get_messages(conv_id=conv_id, batch_size=batch_size)
+    ]
+    if before is not None:
+        cached = [m for m in cached if ObjectId(m.id) < ObjectId(before)]
+    if after is not None:
+        cached = [m for m in cached if ObjectId(m.id) > ObjectId(after)]
+    return sorted(cached, key=lambda m: ObjectId(m.id))
+
+
+async def _load_archived(
+    conv_id: str,
+    limit: int,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> List[DBMessage]:
+    if not settings.archive.ENABLED:
+        return []
+    archived = await message_archive.load(
+        conv_id,
+        limit,
+        before=before.lower() if before else None,
+        after=after.lower() if after else None,
+    )
+    return sorted(
+        (DBMessage.from_document(m) for m in archived), key=lambda m: ObjectId(m.id)
+    )
+
+
+async def _load_stored(
+    service: MessageService,
+    redis: RedisManager,
+    conv_id: str,
+    limit: int,
+    before: Optional[str] = None,
+) -> List[DBMessage]:
+    # cached ids are lowercase hex and compared as strings
+    before = before.lower() if before else before
+    stored = await redis.get_history(conv_id, limit, before=before)
+    if stored is not None:
+        return [DBMessage.from_document(m) for m in stored]
+
+    if before is not None:
+        return await service.find_history(conv_id, limit, order="-id", before=before)
+
+    # newest page missed, warm the conversation with its last persisted messages.
+    # A lagging secondary could leave a hole in the run, so this read skips them
+    generation = await redis.history_generation(conv_id)
+    size = max(limit, settings.chat.HISTORY_CACHE_SIZE)
+    records = await service.find_history(conv_id, size, order="-id", history=False)
+    await redis.fill_history(
+        conv_id,
+        [r.model_dump(by_alias=True, mode="json") for r in records],
+        complete=len(records) < settings.chat.HISTORY_CACHE_SIZE,
+        generation=generation,
+    )
+    return records[:limit]
 
 
 async def load_messages(
-    service: MessageService, redis: RedisManager, conv_id: str
+    service: MessageService,
+    redis: RedisManager,
+    conv_id: str,
+    limit: int = settings.redis.BATCH_SIZE,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
 ) -> List[MessageType]:
-    messages: List[MessageType] = []
+    batch_size = (
+        limit if before is None and after is None else settings.redis.BATCH_SIZE
+    )
+
+    if after is not None:
+        # forward page: oldest messages after the cursor, archived ones are the
+        # oldest of all so they are merged in from the start. Forward pages
+        # catch up on recent writes and read from the primary like replay does
+        cached, db_records, archived = await asyncio.gather(
+            _load_cached(redis, conv_id, max(limit, batch_size), after=after),
+            service.find_history(
+                conv_id, limit, order="id", after=after, history=False
+            ),
+            _load_archived(conv_id, limit, after=after),
+        )
+        page = _merge_sorted([cached, db_records, archived], limit, False)
+        return sorted(page, key=_message_order)
 
-    cached = await redis.get_messages(
-        conv_id=conv_id, batch_size=settings.redis.BATCH_SIZE
+    # backward page: newest messages before the cursor
+    cached, db_records = await asyncio.gather(
+        _load_cached(redis, conv_id, max(limit, batch_size), before=before),
+        _load_stored(service, redis, conv_id, limit, before=before),
     )
-    if cached:
-        messages.extend(CacheMessage.model_validate(r) for r in cached)
+    page = _merge_sorted([cached[::-1], db_records], limit, True)
 
-    remaining = settings.redis.BATCH_SIZE - len(messages)
-    if remaining > 0:
-        db_records = await service.find_all(conversationId=conv_id, limit=remaining)
-        messages.extend(
-            DBMessage.model_validate(
-                {**m.model_dump(), "_id": m.model_dump().pop("id")}
+    if len(page) < limit:
+        archived = await _load_archived(
+            conv_id, limit - len(page), before=page[-1].id if page else before
+        )
+        page = _merge_sorted([page, archived[::-1]], limit, True)
+
+    return sorted(page, key=_message_order)
+
+
+async def load_messages_since(
+    service: MessageService,
+    redis: RedisManager,
+    conv_id: str,
+    last_seen_id: Optional[str] = None,
+    last_seen_seq: Optional[int] = None,
+) -> Tuple[List[MessageType], bool]:
+    limit = settings.chat.REPLAY_LIMIT
+
+    if last_seen_seq is not None:
+
+        def is_newer(r: dict) -> bool:
+            return r.get("seq") is not None and r["seq"] > last_seen_seq
+
+    else:
+        last_seen = ObjectId(last_seen_id)
+
+        def is_newer(r: dict) -> bool:
+            return ObjectId(r["_id"]) > last_seen
+
+    cached = await redis.get_messages(conv_id=conv_id, batch_size=limit)
+    messages: List[MessageType] = [
+        CacheMessage.model_validate(r) for r in cached if is_newer(r)
+    ]
+
+    # the cache only covers the gap if it reaches back to the last seen message
+    if not cached or is_newer(cached[0]):
+        cached_ids = {m.id for m in messages}
+        db_records = await service.find_after(
+            conv_id, limit + 1, after_id=last_seen_id, after_seq=last_seen_seq
+        )
+        messages.extend(m for m in db_records if m.id not in cached_ids)
+
+    messages = sorted(messages, key=_message_order)
+    return messages[:limit], len(messages) > limit
+
+
+async def _last_checkpoint(redis: RedisManager, conv_id: str) -> str:
+    last = await redis.get_last_change_id(conv_id)
+    return last or f"{int(time.time() * 1000)}-0"
+
+
+async def load_changes(
+    service: MessageService,
+    redis: RedisManager,
+    conv_id: str,
+    since: Optional[str],
+    limit: int = settings.chat.SYNC_LIMIT,
+) -> MessageChanges:
+    if not since:
+        return MessageChanges(checkpoint=await _last_checkpoint(redis, conv_id))
+
+    entries = await redis.get_changes(conv_id, since, limit)
+
+    if entries is None:
+        # log no longer covers the checkpoint: resend what was created since then,
+        # edits and deletions are unknown so the client has to drop its window
+        since_ms = int(since.partition("-")[0])
+        since_dt = datetime.fromtimestamp(since_ms / 1000, tz=timezone.utc)
+        messages, truncated = await load_messages_since(
+            service, redis, conv_id, last_seen_id=str(ObjectId.from_datetime(since_dt))
+        )
+        return MessageChanges(
+            checkpoint=await _last_checkpoint(redis, conv_id),
+            messages=messages,
+            has_more=truncated,
+            reset=True,
+        )
+
+    changed: Dict[str, dict] = {}
+    deleted: Dict[str, None] = {}
+    for _, fields in entries:
+        message_id = fields["id"]
+        if fields["op"] == "delete":
+            changed.pop(message_id, None)
+            deleted[message_id] = None
+        elif "data" in fields:
+            changed[message_id] = JSONCodec().loads(fields["data"])
+
+    messages: List[MessageType] = [
+        DBMessage.model_validate(m)
+        if m.get("source") == "db"
+        else CacheMessage.model_validate(m)
+        for m in changed.values()
+    ]
+
+    return MessageChanges(
+        checkpoint=entries[-1][0] if entries else since,
+        messages=sorted(messages, key=_message_order),
+        deleted=list(deleted),
+        has_more=len(entries) == limit,
+    )
+
+
+def _id_millis(object_id: str) -> int:
+    return int(ObjectId(object_id).generation_time.timestamp() * 1000)
+
+
+async def _rebuild_inbox(
+    conv_service: ConversationService,
+    message_service: MessageService,
+    redis: RedisManager,
+    user_id: int,
+) -> List[Tuple[str, int, Optional[dict]]]:
+    # updatedAt is not bumped on new messages, newest conversations stand in
+    conversations = await conv_service.find_all(
+        participants=user_id,
+        order="-id",
+        limit=settings.chat.INBOX_REBUILD_LIMIT,
+        fields=["id", "participants"],
+    )
+    conv_ids = [str(c["id"]) for c in conversations]
+
+    # cached previews are newer than mongo while messages wait to be drained
+    previews = dict(zip(conv_ids, await redis.get_last_messages(conv_ids)))
+    missing = [conv_id for conv_id, preview in previews.items() if preview is None]
+    for message in await message_service.last_messages(missing):
+        previews[message["conversationId"]] = message_preview(message)
+
+    entries = []
+    for conversation, conv_id in zip(conversations, conv_ids):
+        preview = previews.get(conv_id)
+        score = _id_millis(preview["id"] if preview else conv_id)
+        entries.append((conv_id, score, conversation["participants"], preview))
+
+    entries.sort(key=lambda entry: entry[1], reverse=True)
+    await redis.rebuild_inbox(user_id, entries)
+    return [(conv_id, score, preview) for conv_id, score, _, preview in entries]
+
+
+async def load_inbox(
+    conv_service: ConversationService,
+    message_service: MessageService,
+    redis: RedisManager,
+    user_id: int,
+    offset: int = 0,
+    limit: int = settings.chat.INBOX_PAGE_SIZE,
+) -> Inbox:
+    page = await redis.get_inbox(user_id, offset, limit + 1)
+    if page is None:
+        entries = await _rebuild_inbox(conv_service, message_service, redis, user_id)
+        page = entries[offset : offset + limit + 1]
+
+    has_more = len(page) > limit
+    page = page[:limit]
+
+    conv_ids = [conv_id for conv_id, _, _ in page]
+    conversations = {str(c.id): c for c in await conv_service.find_by_ids(conv_ids)}
+    unread = dict(zip(conv_ids, await redis.get_unread(user_id, conv_ids)))
+    return Inbox(
+        conversations=[
+            InboxEntry(
+                conversation=conversations[conv_id],
+                last_message=preview,
+                last_activity=score,
+                unread=unread[conv_id],
+            )
+            for conv_id, score, preview in page
+            if conv_id in conversations
+        ],
+        has_more=has_more,
+    )
+
+
+async def load_read_receipts(
+    service: ReadPositionService, redis: RedisManager, conv_id: str
+) -> ReadReceipts:
+    # mongo holds flushed positions, redis the ones not flushed yet
+    records = await service.find_all(
+        conversationId=conv_id,
+        limit=settings.chat.READ_FLUSH_BATCH,
+        fields=["userId", "messageId"],
+    )
+    positions = {r["userId"]: str(r["messageId"]) for r in records}
+    for user_id, message_id in (await redis.get_read_positions(conv_id)).items():
+        positions[int(user_id)] = max(positions.get(int(user_id), ""), message_id)
+
+    return ReadReceipts(conversation_id=conv_id, positions=positions)
+
+
+async def flush_read_positions(
+    service: ReadPositionService,
+    redis: RedisManager,
+    batch_size: int = settings.chat.READ_FLUSH_BATCH,
+) -> int:
+    reads = await redis.pop_dirty_reads(batch_size)
+    if not reads:
+        return 0
+
+    try:
+        await service.upsert_many(reads)
+    except Exception:
+        await redis.restore_dirty_reads(reads)
+        raise
+    return len(reads)
+
+
+def _search_hit(message: dict, source: str) -> SearchHit:
+    return SearchHit(
+        id=str(message["_id"]),
+        conversationId=str(message["conversationId"]),
+        authorId=message["authorId"],
+        text=(message.get("content") or {}).get("text"),
+        seq=message.get("seq"),
+        score=message.get("score"),
+        source=source,
+    )
+
+
+def decode_search_cursor(
+    cursor: str,
+) -> Tuple[Optional[float], Optional[str], List[str]]:
+    # "<score>:<id>" of the last db hit, then "~" and the cache hits already
+    # returned, so they are not served again once the drainer persists them
+    position, _, served = cursor.partition("~")
+    served_ids = served.split(",") if served else []
+    if not position:
+        return None, None, served_ids
+    score, _, message_id = position.rpartition(":")
+    return float(score), message_id, served_ids
+
+
+def encode_search_cursor(
+    score: Optional[float], message_id: Optional[str], served_ids: List[str]
+) -> str:
+    position = f"{score!r}:{message_id}" if message_id else ""
+    return f"{position}~{','.join(served_ids)}" if served_ids else position
+
+
+async def search_messages(
+    conv_service: ConversationService,
+    service: MessageService,
+    redis: RedisManager,
+    user_id: int,
+    query: str,
+    conversation_id: Optional[str] = None,
+    limit: int = settings.chat.SEARCH_LIMIT,
+    cursor: Optional[str] = None,
+) -> SearchResults:
+    if conversation_id:
+        conv_ids = [conversation_id]
+    else:
+        # newest conversations first, the limit drops the oldest ones
+        conversations = await conv_service.find_all(
+            participants=user_id,
+            order="-id",
+            limit=settings.chat.INBOX_REBUILD_LIMIT,
+            fields=["id"],
+        )
+        conv_ids = [str(c["id"]) for c in conversations]
+
+    # a page holds the cache hits first, newest first, then db hits by relevance
+    hits: List[SearchHit] = []
+    if cursor:
+        after_score, after_id, served_ids = decode_search_cursor(cursor)
+    else:
+        after_score, after_id, served_ids = None, None, []
+        # messages not persisted yet are only in redis, they lead the first page
+        recent = conv_ids[: settings.chat.SEARCH_CACHE_CONVERSATIONS]
+        if not conversation_id:
+            inbox = await redis.get_inbox(
+                user_id, 0, settings.chat.SEARCH_CACHE_CONVERSATIONS
             )
-            for m in db_records
+            if inbox is not None:
+                recent = [conv_id for conv_id, _, _ in inbox]
+        cached = await redis.search_messages(
+            recent, query.lower().split(), settings.chat.SEARCH_CACHE_SCAN
+        )
+        cached.sort(key=lambda m: m["_id"], reverse=True)
+        # hits past the limit are served from the db once persisted
+        hits = [_search_hit(m, "cache") for m in cached[:limit]]
+        served_ids = [hit.id for hit in hits]
+
+    remaining = limit - len(hits)
+    records = []
+    if remaining > 0:
+        records = await service.search(
+            query,
+            conv_ids,
+            remaining,
+            after_score=after_score,
+            after_id=after_id,
+            exclude_ids=served_ids,
         )
+        hits.extend(_search_hit(r, "db") for r in records)
 
-    messages = sorted(messages, key=lambda m: m.id)
-    return messages
+    next_cursor = None
+    if remaining == 0:
+        next_cursor = encode_search_cursor(None, None, served_ids)
+    elif len(records) == remaining:
+        last = records[-1]
+        next_cursor = encode_search_cursor(last["score"], str(last["_id"]), served_ids)
+    return SearchResults(messages=hits, next_cursor=next_cursor)
@@ -35,6 +35,20 @@ celery_app.conf.beat_schedule = {
             "queue": settings.celery.TASKS_QUEUE,
         },
     },
+    "archive-messages-task": {
+        "task": "app.tasks.run_archive_messages",
+        "schedule": settings.archive.INTERVAL,
+        "options": {
+            "queue": settings.celery.TASKS_QUEUE,
+        },
+    },
+    "flush-read-positions-task": {
+        "task": "app.tasks.run_flush_read_positions",
+        "schedule": settings.chat.READ_FLUSH_INTERVAL,
+        "options": {
+            "queue": settings.celery.TASKS_QUEUE,
+        },
+    },
 }
 
 celery_app.autodiscover_tasks(["app.tasks"])
@@ -1,4 +1,5 @@
 db = db.getSiblingDB('chat-db'); // later to env
+// keep in sync with app/models/mongo/indexes.py, applied at startup as well
 
 db.messages.createIndexes([
   { key: { conversationId: 1, createdAt: -1 } },
@@ -7,7 +8,26 @@ db.messages.createIndexes([
   { key: { "content.text": "text" } }
 ]);
 
+db.messages.createIndex(
+  { conversationId: 1, seq: 1 },
+  { unique: true, partialFilterExpression: { seq: { $exists: true } } }
+);
+
 db.conversations.createIndexes([
-  { key: { "participants.userId": 1, updatedAt: -1 } },
+  { key: { participants: 1, _id: -1 } },
   { key: { updatedAt: -1 } }
 ]);
+
+db.read_positions.createIndex(
+  { conversationId: 1, userId: 1 },
+  { unique: true }
+);
+
+db.archive_segments.createIndexes([
+  { key: { key: 1 }, unique: true },
+  { key: { conversationId: 1, lastId: -1 } }
+]);
+
+// change stream deletes need the pre-image to know the conversation
+db.runCommand({ collMod: "messages", changeStreamPreAndPostImages: { enabled: true } });
+db.runCommand({ collMod: "conversations", changeStreamPreAndPostImages: { enabled: true } });